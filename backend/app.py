@@ -6,9 +6,9 @@ from flask_socketio import SocketIO
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
-from blueprints.slideshow import slideshow
+from blueprints.slideshow import slideshow, setup_catalog
 from blueprints.monitoring import monitoring, setup_socketio
-from blueprints.spotify import spotify
+from blueprints.spotify import spotify, setup_socketio as setup_spotify_socketio
 from blueprints.config import config
 
 load_dotenv()
@@ -28,6 +28,8 @@ app.register_blueprint(slideshow, url_prefix="/slideshow")
 app.register_blueprint(config, url_prefix="/config")
 
 setup_socketio(socketio)
+setup_spotify_socketio(socketio)
+setup_catalog()
 
 if __name__ == "__main__":
     socketio.run(
@@ -0,0 +1,158 @@
+"""
+Compare the json.loads and stream parse modes of fetch_ohm_data.
+
+Record payloads from the monitored PC first, e.g.
+
+    curl http://<MONITORED_PC_IP>:8085/data.json -o ohm-big.json
+
+then run from the backend folder:
+
+    python benchmarks/bench_ohm_parse.py ohm-big.json [more.json ...]
+
+Without arguments a large payload (4 GPUs, 12 disks) is synthesised.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blueprints.ohm_parser import parse_ohm_stream  # noqa: E402
+
+# `blueprints.monitoring` is shadowed by the Blueprint of the same name.
+monitoring = importlib.import_module("blueprints.monitoring")
+
+
+def synthesise_payload(gpus=4, disks=12):
+    next_id = [0]
+
+    def node(text, children=(), value=""):
+        next_id[0] += 1
+        return {
+            "id": next_id[0],
+            "Text": text,
+            "Children": list(children),
+            "Min": value,
+            "Value": value,
+            "Max": value,
+            "ImageURL": "images/transparent.png",
+        }
+
+    def group(text, sensors, unit="%"):
+        return node(text, [node(s, value=f"{i * 1.5:.1f} {unit}".replace(".", ",")) for i, s in enumerate(sensors)])
+
+    cores = [f"CPU Core #{i}" for i in range(1, 17)]
+    hardware = [
+        node(
+            "Intel Core i9-13900K",
+            [
+                group("Clocks", ["Bus Speed"] + cores, "MHz"),
+                group("Temperatures", cores + ["CPU Package"], "°C"),
+                group("Load", ["CPU Total"] + cores),
+                group("Powers", ["CPU Package", "CPU Cores", "CPU Graphics", "CPU DRAM"], "W"),
+            ],
+        ),
+        node(
+            "Generic Memory",
+            [group("Load", ["Memory"]), group("Data", ["Used Memory", "Available Memory"], "GB")],
+        ),
+    ]
+    for i in range(gpus):
+        hardware.append(
+            node(
+                f"NVIDIA GeForce RTX 4090 #{i}",
+                [
+                    group("Clocks", ["GPU Core", "GPU Memory", "GPU Shader"], "MHz"),
+                    group("Temperatures", ["GPU Core", "GPU Hot Spot"], "°C"),
+                    group("Load", ["GPU Core", "GPU Frame Buffer", "GPU Video Engine", "GPU Bus Interface", "GPU Memory"]),
+                    group("Fans", ["GPU Fan 1", "GPU Fan 2"], "RPM"),
+                    group("Controls", ["GPU Fan 1", "GPU Fan 2"]),
+                    group("Data", ["GPU Memory Free", "GPU Memory Used", "GPU Memory Total"], "MB"),
+                    group("Powers", ["GPU Power"], "W"),
+                ],
+            )
+        )
+    for i in range(disks):
+        hardware.append(
+            node(
+                f"Samsung SSD 990 PRO #{i}",
+                [group("Temperatures", ["Temperature", "Temperature 2"], "°C"), group("Load", ["Used Space"])],
+            )
+        )
+
+    return json.dumps(node("Sensor", [node("GAMING-PC", hardware)])).encode("utf-8")
+
+
+def parse_json(body):
+    return json.loads(body.decode("utf-8"))
+
+
+def parse_stream(body, disks, chunk_size):
+    chunks = (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+    return parse_ohm_stream(chunks, monitoring.wanted_ohm_sensors(), disks)
+
+
+def extract_all(data, disks):
+    values = [
+        monitoring.extract_sensor_value(data, name, parent)
+        for name, parent in monitoring.STAT_SENSORS.values()
+    ]
+    values.extend(monitoring.get_disk_used_space(data, disk) for disk in disks)
+    return values
+
+
+def measure(label, parse, disks, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_all(parse(), disks)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"  {label:<7} median {statistics.median(timings) * 1e3:7.3f} ms"
+        f"   min {min(timings) * 1e3:7.3f} ms   peak alloc {peak / 1024:8.1f} KiB"
+    )
+    return extract_all(result, disks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("payloads", nargs="*", help="recorded OHM data.json files")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=monitoring.OHM_STREAM_CHUNK_SIZE)
+    parser.add_argument("--disks", default="", help="comma-separated disk names")
+    args = parser.parse_args()
+
+    payloads = [(path, open(path, "rb").read()) for path in args.payloads]
+    if not payloads:
+        payloads = [("synthetic (4 GPUs, 12 disks)", synthesise_payload())]
+        disks = ["Samsung SSD 990 PRO #0", "Samsung SSD 990 PRO #7"]
+    else:
+        disks = [d.strip() for d in args.disks.split(",") if d.strip()]
+
+    for name, body in payloads:
+        print(f"{name}: {len(body) / 1024:.1f} KiB")
+        full = measure("json", lambda: parse_json(body), disks, args.repeat)
+        pruned = measure(
+            "stream",
+            lambda: parse_stream(body, disks, args.chunk_size),
+            disks,
+            args.repeat,
+        )
+        if full != pruned:
+            print("  WARNING: stream mode extracted different values")
+
+
+if __name__ == "__main__":
+    main()
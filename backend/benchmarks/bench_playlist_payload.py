@@ -0,0 +1,180 @@
+"""
+Compare what the Spotify page downloads and parses before it can show a
+large playlist: the full raw Spotify items (what /spotify/playlist/<id>
+used to return) against the first page of trimmed tracks.
+
+A local stand-in for the Spotify Web API serves a playlist of full-size
+track objects (available markets, album objects, external ids). Parse time
+is json.loads on this machine, a stand-in for the Pi's browser doing
+JSON.parse. From the backend folder:
+
+    python benchmarks/bench_playlist_payload.py [--tracks 3000]
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import argparse  # noqa: E402
+import importlib  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # noqa: E402
+from urllib.parse import parse_qs, urlparse  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+# `blueprints.spotify` is shadowed by the Blueprint of the same name.
+spotify = importlib.import_module("blueprints.spotify")
+
+MARKETS = [f"{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(185)]
+
+
+def raw_item(i):
+    """A playlist item shaped (and sized) like the Web API's."""
+    artist = {
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/artist{i % 50}"},
+        "href": f"https://api.spotify.com/v1/artists/artist{i % 50}",
+        "id": f"artist{i % 50}",
+        "name": f"Artist {i % 50}",
+        "type": "artist",
+        "uri": f"spotify:artist:artist{i % 50}",
+    }
+    album = {
+        "album_type": "album",
+        "artists": [artist],
+        "available_markets": MARKETS,
+        "external_urls": {"spotify": f"https://open.spotify.com/album/album{i // 10}"},
+        "href": f"https://api.spotify.com/v1/albums/album{i // 10}",
+        "id": f"album{i // 10}",
+        "images": [
+            {"height": size, "width": size, "url": f"https://i.scdn.co/image/{size}-{i // 10:024d}"}
+            for size in (640, 300, 64)
+        ],
+        "name": f"Album {i // 10}",
+        "release_date": "2021-05-14",
+        "release_date_precision": "day",
+        "total_tracks": 10,
+        "type": "album",
+        "uri": f"spotify:album:album{i // 10}",
+    }
+    return {
+        "added_at": "2023-01-01T12:00:00Z",
+        "added_by": {"id": "user", "type": "user", "uri": "spotify:user:user"},
+        "is_local": False,
+        "primary_color": None,
+        "track": {
+            "album": album,
+            "artists": [artist],
+            "available_markets": MARKETS,
+            "disc_number": 1,
+            "duration_ms": 180000 + i,
+            "episode": False,
+            "explicit": False,
+            "external_ids": {"isrc": f"USRC1{i:07d}"},
+            "external_urls": {"spotify": f"https://open.spotify.com/track/track{i:016d}"},
+            "href": f"https://api.spotify.com/v1/tracks/track{i:016d}",
+            "id": f"track{i:016d}",
+            "is_local": False,
+            "name": f"Track number {i}",
+            "popularity": 50,
+            "preview_url": None,
+            "track": True,
+            "track_number": i % 10 + 1,
+            "type": "track",
+            "uri": f"spotify:track:track{i:016d}",
+        },
+        "video_thumbnail": {"url": None},
+    }
+
+
+class StandInSpotify(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    items = []
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/tracks"):
+            offset = int(query["offset"][0])
+            limit = int(query["limit"][0])
+            self._reply({"items": self.items[offset:offset + limit]})
+        else:
+            self._reply({"name": "Bench", "snapshot_id": "1", "tracks": {"total": len(self.items)}})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply({"access_token": "stand-in-token", "expires_in": 3600})
+
+
+def timed(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    StandInSpotify.items = [raw_item(i) for i in range(args.tracks)]
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSpotify)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    spotify.TOKEN_URL = f"{base}/api/token"
+    spotify.SPOTIFY_API_GENERIC = f"{base}/v1"
+
+    app = Flask(__name__)
+    app.register_blueprint(spotify.spotify, url_prefix="/spotify")
+    client = app.test_client()
+    client.get("/spotify/playlist/bench")  # fill the playlist cache
+
+    raw_body = json.dumps({"name": "Bench", "tracks": {"items": StandInSpotify.items}}).encode()
+    raw_parse, _ = timed(lambda: json.loads(raw_body), args.rounds)
+    first_ms, first_body = timed(
+        lambda: client.get("/spotify/playlist/bench").get_data(), args.rounds
+    )
+    first_parse, _ = timed(lambda: json.loads(first_body), args.rounds)
+    full_size = 0
+    offset = 0
+    while offset is not None:
+        response = client.get(f"/spotify/playlist/bench?offset={offset}")
+        full_size += len(response.get_data())
+        offset = response.get_json()["next_offset"]
+
+    print(f"{args.tracks} tracks")
+    print(f"  raw items, whole playlist    {len(raw_body) / 1024:9.1f} KiB   parse {raw_parse:7.2f} ms")
+    print(f"  trimmed, all pages           {full_size / 1024:9.1f} KiB")
+    print(
+        f"  trimmed, first page          {len(first_body) / 1024:9.1f} KiB   parse {first_parse:7.2f} ms"
+        f"   (cached response {first_ms:.2f} ms)"
+    )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Measure play/pause/next latency through the /spotify routes against a local
+stand-in for the Spotify Web API, with and without the pooled session.
+
+Real Spotify calls pay a TCP + TLS handshake (several round trips) for every
+new connection; the stand-in models that with --connect-delay, a sleep at
+the start of each new connection. The session's request pacing (5 req/s per
+endpoint) is switched off for that comparison, since it would measure
+throttling rather than connection reuse; the last line shows the pooled
+session with pacing on. From the backend folder:
+
+    python benchmarks/bench_spotify_session.py [--requests 50] [--connect-delay 30]
+"""
+
+import eventlet
+
+eventlet.monkey_patch()
+
+import argparse  # noqa: E402
+import importlib  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+# `blueprints.spotify` is shadowed by the Blueprint of the same name.
+spotify = importlib.import_module("blueprints.spotify")
+
+
+class StandInSpotify(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+    connect_delay = 0.0
+    connections = 0
+    requests = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+        time.sleep(self.connect_delay)
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        type(self).requests += 1
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _drain(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def do_GET(self):
+        if self.path.startswith("/v1/me/player/devices"):
+            self._reply(200, {"devices": [{"id": "stand-in-device"}]})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        self._drain()
+        if self.path.startswith("/api/token"):
+            self._reply(200, {"access_token": "stand-in-token", "expires_in": 3600})
+        else:
+            self._reply(204)
+
+    def do_PUT(self):
+        self._drain()
+        self._reply(204)
+
+
+class FreshConnectionSession(spotify.SpotifySession):
+    """What the blueprint did before: a new connection for every request."""
+
+    def request(self, method, url, **kwargs):
+        with spotify.SpotifySession() as one_off:
+            return one_off.request(method, url, **kwargs)
+
+
+def run(client, count):
+    timings = []
+    for i in range(count):
+        route = ("/spotify/play", "/spotify/pause", "/spotify/next")[i % 3]
+        start = time.perf_counter()
+        response = client.post(route)
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{route} returned {response.status_code}: {response.get_data()}")
+    return timings
+
+
+UNPACED = (1e6, 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--connect-delay", type=float, default=30, help="ms per new connection")
+    args = parser.parse_args()
+
+    StandInSpotify.connect_delay = args.connect_delay / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSpotify)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    spotify.TOKEN_URL = f"{base}/api/token"
+    spotify.SPOTIFY_API_BASE_URL = f"{base}/v1/me/player"
+
+    app = Flask(__name__)
+    app.register_blueprint(spotify.spotify, url_prefix="/spotify")
+    client = app.test_client()
+
+    rate_limits = (spotify.SPOTIFY_RATE_LIMIT, spotify.SPOTIFY_ENDPOINT_RATE_LIMITS)
+    modes = (
+        ("fresh connections", FreshConnectionSession, False),
+        ("pooled session", spotify.create_session, False),
+        ("pooled, paced", spotify.create_session, True),
+    )
+    print(f"{args.requests} play/pause/next calls, {args.connect_delay:.0f} ms per new connection")
+    for label, make_session, paced in modes:
+        # Buckets take their limits when they're created, i.e. on first use.
+        if paced:
+            spotify.SPOTIFY_RATE_LIMIT, spotify.SPOTIFY_ENDPOINT_RATE_LIMITS = rate_limits
+        else:
+            spotify.SPOTIFY_RATE_LIMIT, spotify.SPOTIFY_ENDPOINT_RATE_LIMITS = UNPACED, {}
+        spotify.session = make_session()
+        spotify.invalidate_access_token()
+        spotify.invalidate_active_device()
+        StandInSpotify.connections = 0
+        StandInSpotify.requests = 0
+        timings = run(client, args.requests)
+        print(
+            f"  {label:<18} median {statistics.median(timings) * 1e3:7.2f} ms"
+            f"   p90 {sorted(timings)[int(len(timings) * 0.9)] * 1e3:7.2f} ms"
+            f"   connections {StandInSpotify.connections}"
+            f"   upstream calls/command {StandInSpotify.requests / args.requests:.2f}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Time storing a large multipart upload three ways, Werkzeug's form parsing
+included:
+
+  hash, seek, save   Werkzeug spools the file to its own temp file, the view
+                     hashes it in 8 KB reads, seeks back and FileStorage.save
+                     copies it into place (the original upload_file)
+  spool, then copy   same spool, then one 1 MB pass that hashes while
+                     copying into a temp file in the upload folder
+  spool into place   Werkzeug spools straight into an upload_spool
+                     HashingFile in the upload folder, which is renamed
+                     into place (the current upload_file)
+
+"written" is what went through write() calls (wchar in /proc/self/io), so
+it only shows on Linux. From the backend folder:
+
+    python benchmarks/bench_upload_pipeline.py [--size-mb 300] [--rounds 3]
+"""
+
+import argparse
+import hashlib
+import importlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.formparser import FormDataParser  # noqa: E402
+
+# `blueprints.slideshow` is shadowed by the Blueprint of the same name.
+slideshow = importlib.import_module("blueprints.slideshow")
+from blueprints.upload_spool import HashingSpool  # noqa: E402
+
+BOUNDARY = "bench-boundary"
+
+
+def bytes_written():
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def parse(body_path, stream_factory=None):
+    """The uploaded FileStorage, parsed the way a request's form would be."""
+    parser = FormDataParser(stream_factory=stream_factory)
+    with open(body_path, "rb") as body:
+        _, _, files = parser.parse(
+            body,
+            "multipart/form-data",
+            os.path.getsize(body_path),
+            {"boundary": BOUNDARY},
+        )
+    return files["file"]
+
+
+def hash_seek_save(body_path, folder):
+    file = parse(body_path)
+    hash_obj = hashlib.sha256()
+    while chunk := file.stream.read(8192):
+        hash_obj.update(chunk)
+    file.stream.seek(0)
+    file.save(os.path.join(folder, "video.mp4"))
+    file.close()
+    return hash_obj.hexdigest()
+
+
+def spool_then_copy(body_path, folder):
+    file = parse(body_path)
+    hash_obj = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=slideshow.UPLOAD_TEMP_PREFIX, suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        while chunk := file.stream.read(slideshow.UPLOAD_CHUNK_SIZE):
+            hash_obj.update(chunk)
+            out.write(chunk)
+    file.close()
+    os.replace(temp_path, os.path.join(folder, "video.mp4"))
+    return hash_obj.hexdigest()
+
+
+def spool_into_place(body_path, folder):
+    spool = HashingSpool(folder, slideshow.UPLOAD_TEMP_PREFIX)
+    try:
+        file = parse(body_path, spool)
+        file.stream.close()
+        os.replace(file.stream.path, os.path.join(folder, "video.mp4"))
+        return file.stream.hexdigest()
+    finally:
+        spool.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        body_path = os.path.join(folder, "request-body")
+        with open(body_path, "wb") as f:
+            f.write(
+                f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="video.mp4"\r\nContent-Type: video/mp4\r\n\r\n'.encode()
+            )
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+            f.write(f"\r\n--{BOUNDARY}--\r\n".encode())
+
+        upload_folder = os.path.join(folder, "uploads")
+        print(f"{args.size_mb} MB upload, median of {args.rounds}")
+        digests = set()
+        pipelines = (
+            ("hash, seek, save", hash_seek_save),
+            ("spool, then copy", spool_then_copy),
+            ("spool into place", spool_into_place),
+        )
+        for label, pipeline in pipelines:
+            timings = []
+            for _ in range(args.rounds):
+                os.makedirs(upload_folder)
+                before = bytes_written()
+                start = time.perf_counter()
+                digests.add(pipeline(body_path, upload_folder))
+                timings.append(time.perf_counter() - start)
+                after = bytes_written()
+                shutil.rmtree(upload_folder)
+            seconds = statistics.median(timings)
+            written = "" if before is None else f"   {(after - before) / 2**20:6.0f} MB written"
+            print(f"  {label:<17} {seconds * 1e3:8.0f} ms   {args.size_mb / seconds:7.0f} MB/s{written}")
+        assert len(digests) == 1, "pipelines disagree on the hash"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+// Time client-side decoding of the messages dumped by bench_wire_format.py:
+//
+//     python benchmarks/bench_wire_format.py --dump messages.json
+//     node benchmarks/bench_wire_decode.js messages.json
+//
+// JSON messages are timed with JSON.parse (what Socket.IO does for text
+// events), packed ones with the frontend's decodePackedStats.
+
+const fs = require("fs");
+const path = require("path");
+const { compilePackedSchema, decodePackedStats } = require(
+    path.join(__dirname, "..", "..", "frontend", "pages", "resources", "packed-stats.js")
+);
+
+const dump = JSON.parse(fs.readFileSync(process.argv[2] || "messages.json", "utf8"));
+const schema = compilePackedSchema(dump.schema);
+const packed = dump.packed.map((b64) => {
+    const bytes = Buffer.from(b64, "base64");
+    return bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+});
+const ROUNDS = 200;
+
+function time(label, messages, decode) {
+    for (let i = 0; i < 5; i++) messages.forEach(decode); // warm up
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < ROUNDS; i++) messages.forEach(decode);
+    const ns = Number(process.hrtime.bigint() - start) / (ROUNDS * messages.length);
+    console.log(`${label.padEnd(7)} ${ns.toFixed(0).padStart(6)} ns per message`);
+}
+
+time("json", dump.json, (text) => JSON.parse(text));
+time("packed", packed, (buffer) => decodePackedStats(buffer, schema));
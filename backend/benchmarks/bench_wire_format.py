@@ -0,0 +1,141 @@
+"""
+Compare the bytes on the wire for the JSON and packed stats formats.
+
+Simulates a subscription to cpu/gpu/ram every tick, disks every 5 ticks and
+network every 3 (like the default one) with random-walk sensor values, runs
+the ticks through send_update for both formats and counts what Socket.IO
+would put on a WebSocket, framing included. From the backend folder:
+
+    python benchmarks/bench_wire_format.py [--ticks 3600] [--dump messages.json]
+
+`--dump` writes the messages for benchmarks/bench_wire_decode.js, which
+times decoding them with the frontend's decoders under Node.
+"""
+
+import argparse
+import base64
+import importlib
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blueprints.host_registry import Host  # noqa: E402
+from blueprints.subscriptions import Subscription  # noqa: E402
+
+# `blueprints.monitoring` is shadowed by the Blueprint of the same name.
+monitoring = importlib.import_module("blueprints.monitoring")
+
+BINARY_PLACEHOLDER = '451-["update_stats_packed",{"_placeholder":true,"num":0}]'
+
+
+def ws_frame(payload_size):
+    """Server-to-client WebSocket frame size (unmasked)."""
+    if payload_size < 126:
+        return payload_size + 2
+    if payload_size < 65536:
+        return payload_size + 4
+    return payload_size + 10
+
+
+class Recorder:
+    """Stands in for the SocketIO server and records what would be sent."""
+
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, event, data, to=None):
+        self.messages.append((event, data))
+
+
+def wire_size(event, data):
+    if isinstance(data, bytes):
+        return ws_frame(len(BINARY_PLACEHOLDER)) + ws_frame(len(data))
+    text = "42" + json.dumps([event, data], separators=(",", ":"))
+    return ws_frame(len(text.encode("utf-8")))
+
+
+def simulate(host, groups, ticks, seed):
+    rng = random.Random(seed)
+    state = {"cpu_usage": 20.0, "cpu_temp": 55.0, "cpu_power": 60.0, "gpu_usage": 30.0,
+             "gpu_temp": 50.0, "gpu_power": 120.0, "ram_usage_gb": 12.0}
+    disks = {name: rng.uniform(20, 90) for name in host.disks}
+    network = {adapter: {"upload": 50.0, "download": 800.0} for adapter in host.network}
+
+    def walk(value, step, lo, hi):
+        return round(min(hi, max(lo, value + rng.gauss(0, step))), 1)
+
+    results = {}
+    for wire_format in ("json", "packed"):
+        rng.seed(seed)
+        recorder = Recorder()
+        monitoring.socketio = recorder
+        subscription = Subscription(host, groups, wire_format)
+        if wire_format == "packed":
+            subscription.schema = monitoring.packed_schema(host, groups)
+        subscription.sids.add("bench")
+
+        for tick in range(1, ticks + 1):
+            for key in state:
+                state[key] = walk(state[key], 1.5, 0, 400)
+            for name in disks:
+                disks[name] = walk(disks[name], 0.02, 0, 100)
+            for speeds in network.values():
+                for field in speeds:
+                    speeds[field] = walk(speeds[field], 200, 0, 100000)
+
+            due = subscription.due_groups(tick)
+            stats = {**state, "disks": dict(disks), "network": {a: dict(s) for a, s in network.items()}}
+            monitoring.send_update(subscription, monitoring.select_groups(stats, due))
+
+        results[wire_format] = (subscription, recorder.messages)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=3600)
+    parser.add_argument("--disks", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dump", help="write the messages to this JSON file")
+    args = parser.parse_args()
+
+    host = Host(
+        "bench",
+        "127.0.0.1",
+        disks=[f"Samsung SSD 990 PRO #{i}" for i in range(args.disks)],
+        network=["Ethernet"],
+    )
+    groups = {"cpu": 1, "gpu": 1, "ram": 1, "disks": 5, "network": 3}
+    results = simulate(host, groups, args.ticks, args.seed)
+
+    for wire_format, (_, messages) in results.items():
+        total = sum(wire_size(event, data) for event, data in messages)
+        payload = sum(
+            len(data) if isinstance(data, bytes) else len(json.dumps(data, separators=(",", ":")))
+            for _, data in messages
+        )
+        print(
+            f"{wire_format:<7} {total / args.ticks:7.1f} B/s on the wire"
+            f"   ({payload / args.ticks:6.1f} B/s of payload, {len(messages)} messages)"
+        )
+
+    if args.dump:
+        subscription, packed = results["packed"]
+        _, plain = results["json"]
+        with open(args.dump, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "schema": subscription.schema.describe(),
+                    "json": [json.dumps(data, separators=(",", ":")) for _, data in plain],
+                    "packed": [base64.b64encode(data).decode("ascii") for _, data in packed],
+                },
+                f,
+            )
+        print(f"Messages written to {args.dump}")
+
+
+if __name__ == "__main__":
+    main()
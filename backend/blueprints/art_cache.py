@@ -0,0 +1,87 @@
+import os
+import tempfile
+from collections import OrderedDict
+
+from eventlet.patcher import original
+
+# get/put run in eventlet's native tpool threads, where the green lock that
+# monkey_patch puts behind threading.Lock isn't safe. The sections it guards
+# are dict updates, so a real lock never holds up the hub for long.
+_threading = original("threading")
+
+
+class ArtCache:
+    """
+    Resized album art on disk, one file per key, bounded to `max_bytes`.
+
+    The index (key -> size, least recently used first) is rebuilt from the
+    files' modification times at startup; hits bump the mtime so the order
+    survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = _threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """The cached bytes, or None."""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self._forget(key)
+            return None
+        return data
+
+    def put(self, key, data):
+        """Store `data` under `key`, evicting the least recently used files."""
+        path = self.path(key)
+        # Own temp file per write: two misses for the same key can race here.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self._forget(key)
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key = next(iter(self.entries))
+                self._forget(old_key)
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self.path(old_key))
+            except OSError:
+                pass
+
+    def _forget(self, key):
+        size = self.entries.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
@@ -1,3 +1,4 @@
+import importlib
 import os
 import re
 from pathlib import Path
@@ -175,7 +176,11 @@ def apply_runtime_updates(env_updates: dict) -> None:
         os.environ[key] = value
 
     try:
-        from blueprints import monitoring, slideshow, spotify
+        # The package re-exports each module's Blueprint under the module's
+        # name, so `from blueprints import spotify` would give the Blueprint.
+        monitoring = importlib.import_module(".monitoring", __package__)
+        slideshow = importlib.import_module(".slideshow", __package__)
+        spotify = importlib.import_module(".spotify", __package__)
 
         monitoring.MONITORED_PC_IP = os.getenv("MONITORED_PC_IP") or ""
         monitoring.MONITORED_PC_MAC = os.getenv("MONITORED_PC_MAC") or ""
@@ -185,23 +190,31 @@ def apply_runtime_updates(env_updates: dict) -> None:
             for d in monitoring.RAW_MONITORED_DISKS.split(",")
             if d.strip()
         ]
-        monitoring.OHM_API_URL = (
-            f"http://{monitoring.MONITORED_PC_IP}:8085/data.json"
-            if monitoring.MONITORED_PC_IP
-            else ""
-        )
+        monitoring.reload_default_host()
 
+        # The settings page posts every key on each save; only a real
+        # credentials change may drop the token, device and playlist caches.
+        old_credentials = (spotify.CLIENT_ID, spotify.CLIENT_SECRET, spotify.REFRESH_TOKEN)
         spotify.CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
         spotify.CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
         spotify.REFRESH_TOKEN = os.getenv("SPOTIFY_REFRESH_TOKEN")
+        new_credentials = (spotify.CLIENT_ID, spotify.CLIENT_SECRET, spotify.REFRESH_TOKEN)
+        if [v or "" for v in old_credentials] != [v or "" for v in new_credentials]:
+            spotify.invalidate_access_token()
+            spotify.invalidate_active_device()
+            spotify.invalidate_playlists()
 
         new_upload_folder = os.getenv("UPLOAD_FOLDER") or "uploads"
         os.makedirs(new_upload_folder, exist_ok=True)
         slideshow.UPLOAD_FOLDER = new_upload_folder
         slideshow.HASH_FILE = os.path.join(new_upload_folder, "hashes.json")
+        slideshow.HASH_DB = os.path.join(new_upload_folder, "hashes.sqlite3")
+        slideshow.reload_hash_index()
+        slideshow.reload_catalog()
+        slideshow.reload_upload_sessions()
         current_app.config["UPLOAD_FOLDER"] = new_upload_folder
-    except Exception:
-        pass
+    except Exception as e:
+        print("[ERROR] Failed to apply config changes at runtime:", e)
 
 
 @config.route("", methods=["GET"])
@@ -0,0 +1,122 @@
+import json
+import os
+import sqlite3
+import threading
+
+
+class HashIndex:
+    """
+    SHA-256 -> filename index of the slideshow uploads, in SQLite (WAL).
+
+    Every change is its own transaction, so concurrent uploads and deletes
+    can't lose each other's updates. On first open, entries from the old
+    `hashes.json` (`legacy_path`) are imported and the file is renamed to
+    `hashes.json.migrated`.
+    """
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS media_hashes ("
+            " hash TEXT PRIMARY KEY, filename TEXT NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS media_hashes_filename ON media_hashes (filename)"
+        )
+        if legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path):
+        try:
+            with open(legacy_path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Could not migrate {legacy_path}: {e}")
+            return
+
+        with self.lock, self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO media_hashes (hash, filename) VALUES (?, ?)",
+                entries.items(),
+            )
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        print(f"Migrated {len(entries)} hashes from {legacy_path} to {self.path}")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def contains(self, file_hash):
+        return self.filename_for(file_hash) is not None
+
+    def known(self, hashes):
+        """The subset of `hashes` that is already indexed."""
+        hashes = list(hashes)
+        found = set()
+        with self.lock:
+            # Stay under SQLite's default limit of 999 bound parameters.
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows = self.db.execute(
+                    "SELECT hash FROM media_hashes WHERE hash IN"
+                    f" ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def filename_for(self, file_hash):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT filename FROM media_hashes WHERE hash = ?", (file_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def hashes_for(self, filename):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT hash FROM media_hashes WHERE filename = ?", (filename,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def by_filename(self):
+        """filename -> hash for every indexed upload."""
+        with self.lock:
+            rows = self.db.execute("SELECT filename, hash FROM media_hashes").fetchall()
+        return dict(rows)
+
+    def claim(self, file_hash, filename):
+        """
+        Record `file_hash` for `filename` unless the hash is already known.
+        Returns False for a duplicate. Hashes of content previously saved
+        under the same filename (now overwritten) are dropped.
+        """
+        with self.lock, self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            inserted = self.db.execute(
+                "INSERT OR IGNORE INTO media_hashes (hash, filename) VALUES (?, ?)",
+                (file_hash, filename),
+            ).rowcount
+            if inserted:
+                self.db.execute(
+                    "DELETE FROM media_hashes WHERE filename = ? AND hash != ?",
+                    (filename, file_hash),
+                )
+        return bool(inserted)
+
+    def remove_hash(self, file_hash):
+        with self.lock:
+            self.db.execute("DELETE FROM media_hashes WHERE hash = ?", (file_hash,))
+
+    def remove_files(self, filenames):
+        with self.lock, self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "DELETE FROM media_hashes WHERE filename = ?",
+                [(filename,) for filename in filenames],
+            )
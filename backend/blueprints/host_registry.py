@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import threading
+
+
+DEFAULT_OHM_PORT = 8085
+DEFAULT_HOST_NAME = "default"
+
+_HOST_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class Host:
+    """
+    One monitored PC: where its Open Hardware Monitor web server is, which
+    disks to read and how often to poll it. The poll loop keeps the host's
+    runtime state (watching clients, latest stats, history) on it as well.
+    """
+
+    def __init__(
+        self,
+        name,
+        ip,
+        mac="",
+        disks=(),
+        network=(),
+        interval=1,
+        port=DEFAULT_OHM_PORT,
+        history_seconds=24 * 60 * 60,
+    ):
+        self.name = name
+        self.port = port
+        self.set_ip(ip)
+        self.mac = mac or ""
+        self.disks = list(disks)
+        self.network = list(network)
+        self.interval = interval
+        self.history_seconds = history_seconds
+        self.room = f"host:{name}"
+        # Metrics of the .env host keep their original, unprefixed names.
+        self.metric_prefix = "" if name == DEFAULT_HOST_NAME else f"{name}/"
+
+        self.clients = set()
+        # Set when the first client subscribes, to wake an idle poll loop.
+        self.wakeup = threading.Event()
+        # Subscription room name -> Subscription
+        self.subscriptions = {}
+        self.last_stats = {}
+        self.last_update = None
+        self.history = None
+
+    def set_ip(self, ip):
+        self.ip = ip or ""
+        self.url = f"http://{self.ip}:{self.port}/data.json" if self.ip else ""
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "ip": self.ip,
+            "wake": bool(self.mac),
+            "disks": self.disks,
+            "network": self.network,
+            "interval": self.interval,
+            "clients": len(self.clients),
+            "last_update": self.last_update,
+        }
+
+
+def _name_list(value):
+    """Accept a list of names or a comma-separated string, like MONITORED_DISKS."""
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return list(value)
+
+
+def _host_from_entry(entry, defaults):
+    """Build a Host from one registry entry, or return None if it's invalid."""
+    if not isinstance(entry, dict):
+        print("[ERROR] Host registry entries must be objects:", entry)
+        return None
+
+    name = str(entry.get("name", "")).strip()
+    if not _HOST_NAME.match(name):
+        print(f"[ERROR] Invalid host name {name!r} (use letters, digits, '.', '_' or '-').")
+        return None
+    if not entry.get("ip"):
+        print(f"[ERROR] Host '{name}' has no 'ip'.")
+        return None
+
+    disks = _name_list(entry.get("disks", []))
+    network = _name_list(entry.get("network", []))
+
+    try:
+        interval = float(entry.get("interval", defaults["interval"]))
+        port = int(entry.get("port", DEFAULT_OHM_PORT))
+        history_seconds = int(entry.get("history_seconds", defaults["history_seconds"]))
+    except (TypeError, ValueError) as e:
+        print(f"[ERROR] Invalid setting for host '{name}':", e)
+        return None
+    if interval <= 0 or history_seconds <= 0:
+        print(f"[ERROR] Host '{name}' needs a positive interval and history_seconds.")
+        return None
+
+    return Host(
+        name,
+        entry["ip"],
+        mac=entry.get("mac", ""),
+        disks=disks,
+        network=network,
+        interval=interval,
+        port=port,
+        history_seconds=history_seconds,
+    )
+
+
+def load_hosts(path, default_host, interval=1, history_seconds=24 * 60 * 60):
+    """
+    Read the host registry, a JSON list such as
+
+        [{"name": "stream-pc", "ip": "192.168.1.21", "mac": "AA:BB:...",
+          "disks": ["Samsung SSD 980"], "network": ["Ethernet"],
+          "interval": 2}]
+
+    `default_host` (the PC configured in .env) comes first unless the file
+    defines a host with the same name, or it has no IP and the file lists
+    other hosts. Invalid entries are skipped.
+    """
+    hosts = {}
+    defaults = {"interval": interval, "history_seconds": history_seconds}
+
+    entries = []
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Could not read host registry {path}:", e)
+        if not isinstance(entries, list):
+            print(f"[ERROR] Host registry {path} must contain a JSON list.")
+            entries = []
+
+    for entry in entries:
+        host = _host_from_entry(entry, defaults)
+        if host is None:
+            continue
+        if host.name in hosts:
+            print(f"[ERROR] Duplicate host name '{host.name}' in registry, skipping.")
+            continue
+        hosts[host.name] = host
+
+    if default_host.name not in hosts and (default_host.ip or not hosts):
+        hosts = {default_host.name: default_host, **hosts}
+    return hosts
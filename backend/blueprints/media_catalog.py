@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+from PIL import Image
+
+# EXIF orientations that rotate the picture by 90 degrees.
+_ROTATED = {5, 6, 7, 8}
+
+SORT_KEYS = {
+    "name": lambda entry: entry["name"].lower(),
+    "mtime": lambda entry: entry["mtime"],
+    "size": lambda entry: entry["size"],
+}
+
+
+def image_size(path):
+    """(width, height) as displayed, reading only the image header."""
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in _ROTATED:
+            width, height = height, width
+    return width, height
+
+
+def scan_folder(folder, extensions):
+    """(folder mtime in ns, {name: stat}) for the media files in `folder`."""
+    folder_mtime = os.stat(folder).st_mtime_ns
+    found = {}
+    for dir_entry in os.scandir(folder):
+        if dir_entry.name.lower().endswith(extensions) and dir_entry.is_file():
+            found[dir_entry.name] = dir_entry.stat()
+    return folder_mtime, found
+
+
+class MediaCatalog:
+    """
+    In-memory listing of the slideshow uploads with their size, mtime,
+    SHA-256 and (for images) dimensions.
+
+    Built with one directory scan; after that the upload and delete routes
+    call `add`/`remove`, and `rescan` picks up files changed behind the
+    backend's back. `version` changes with every change, so clients can
+    tell an unchanged list from its token alone.
+    """
+
+    def __init__(self, folder, extensions, video_extensions, hashes=None):
+        self.folder = folder
+        self.extensions = extensions
+        self.video_extensions = video_extensions
+        self.entries = {}
+        self.unmeasured = set()  # images whose dimensions haven't been read
+        self.lock = threading.Lock()
+        # Versions from an earlier run must not match this one's.
+        self.epoch = f"{int(time.time()):x}"
+        self.changes = 0
+        self.folder_mtime = None
+        self._sorted = {}
+        self.rescan(hashes or {})
+
+    @property
+    def version(self):
+        return f"{self.epoch}-{self.changes}"
+
+    def _entry(self, name, stat, file_hash):
+        is_video = name.lower().endswith(self.video_extensions)
+        if is_video:
+            self.unmeasured.discard(name)
+        else:
+            self.unmeasured.add(name)
+        return {
+            "name": name,
+            "type": "video" if is_video else "image",
+            "size": stat.st_size,
+            "mtime": int(stat.st_mtime),
+            "width": None,
+            "height": None,
+            "hash": file_hash,
+        }
+
+    def _changed(self):
+        self.changes += 1
+        self._sorted.clear()
+
+    def folder_changed(self):
+        """Whether files were added, removed or renamed since the last scan."""
+        try:
+            return os.stat(self.folder).st_mtime_ns != self.folder_mtime
+        except OSError:
+            return False
+
+    def rescan(self, hashes, scan=None):
+        """
+        Bring the catalog in line with the folder, or with `scan` from
+        scan_folder if given. `hashes` maps filename -> SHA-256 for new
+        files; entries whose size and mtime are unchanged are kept as they
+        are. Returns whether anything changed.
+        """
+        folder_mtime, found = scan or scan_folder(self.folder, self.extensions)
+        with self.lock:
+            self.folder_mtime = folder_mtime
+            changed = False
+            for name in list(self.entries):
+                if name not in found:
+                    del self.entries[name]
+                    self.unmeasured.discard(name)
+                    changed = True
+            for name, stat in found.items():
+                entry = self.entries.get(name)
+                if (
+                    entry is None
+                    or entry["size"] != stat.st_size
+                    or entry["mtime"] != int(stat.st_mtime)
+                ):
+                    self.entries[name] = self._entry(name, stat, hashes.get(name))
+                    changed = True
+            if changed:
+                self._changed()
+        return changed
+
+    def add(self, name, file_hash=None):
+        """Record a new or overwritten upload; other files are ignored."""
+        if not name.lower().endswith(self.extensions):
+            return
+        try:
+            stat = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            return
+        with self.lock:
+            self.entries[name] = self._entry(name, stat, file_hash)
+            self._changed()
+
+    def remove(self, names):
+        with self.lock:
+            removed = [self.entries.pop(name, None) for name in names]
+            self.unmeasured.difference_update(names)
+            if any(removed):
+                self._changed()
+
+    def unmeasured_images(self):
+        with self.lock:
+            return sorted(self.unmeasured)
+
+    def set_dimensions(self, sizes):
+        """
+        Store {name: (width, height) or None} from image_size, None for
+        files that couldn't be read. One version bump for the whole batch.
+        """
+        with self.lock:
+            for name, size in sizes.items():
+                self.unmeasured.discard(name)
+                entry = self.entries.get(name)
+                if entry is not None and size is not None:
+                    entry["width"], entry["height"] = size
+            self._changed()
+
+    def page(self, sort="name", descending=False, offset=0, limit=None):
+        """(version, total, entries) of one page in the given order."""
+        with self.lock:
+            key = (sort, descending)
+            ordered = self._sorted.get(key)
+            if ordered is None:
+                ordered = sorted(self.entries.values(), key=SORT_KEYS[sort], reverse=descending)
+                self._sorted[key] = ordered
+            end = None if limit is None else offset + limit
+            return self.version, len(ordered), [dict(entry) for entry in ordered[offset:end]]
@@ -0,0 +1,117 @@
+import math
+from array import array
+
+
+class MetricHistory:
+    """
+    Fixed-size ring buffer of metric samples.
+
+    All metrics share one float64 timestamp ring and each metric keeps its
+    values in a float32 `array` of the same capacity, so a sample costs 4 bytes
+    per metric (plus 8 for the tick) and no Python objects. Metrics that show
+    up later are back-filled with NaN; new metrics are refused once the
+    memory budget is spent.
+    """
+
+    def __init__(self, capacity, max_bytes):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.values = {}
+        self.start = 0
+        self.size = 0
+
+    def memory_bytes(self):
+        return self.timestamps.itemsize * self.capacity + sum(
+            values.itemsize * self.capacity for values in self.values.values()
+        )
+
+    def oldest(self):
+        """Timestamp of the oldest sample still held, or None when empty."""
+        return self.timestamps[self.start] if self.size else None
+
+    def _add_metric(self, metric):
+        if self.memory_bytes() + 4 * self.capacity > self.max_bytes:
+            return None
+        values = array("f", [math.nan]) * self.capacity
+        self.values[metric] = values
+        return values
+
+    def append(self, timestamp, samples):
+        """Record one tick. `samples` maps metric name -> float."""
+        if self.size < self.capacity:
+            slot = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+
+        self.timestamps[slot] = timestamp
+        for metric, values in self.values.items():
+            if metric not in samples:
+                values[slot] = math.nan
+
+        for metric, value in samples.items():
+            values = self.values.get(metric)
+            if values is None:
+                values = self._add_metric(metric)
+                if values is None:
+                    continue
+            values[slot] = value
+
+    def _first_at_or_after(self, since):
+        """Logical index of the first sample with timestamp >= since."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[(self.start + mid) % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, metric, since, step):
+        """
+        Downsample `metric` from `since` into `step`-second buckets.
+        Returns [bucket start, min, max, avg] rows, skipping empty buckets.
+        Values are rounded to 3 decimals (they are stored as float32).
+        """
+        values = self.values.get(metric)
+        if values is None:
+            return []
+
+        timestamps = self.timestamps
+        capacity = self.capacity
+        rows = []
+        bucket = None
+        lo = hi = total = 0.0
+        count = 0
+
+        for i in range(self._first_at_or_after(since), self.size):
+            slot = (self.start + i) % capacity
+            value = values[slot]
+            if value != value:  # NaN: metric wasn't recorded this tick
+                continue
+
+            key = int((timestamps[slot] - since) // step)
+            if key != bucket:
+                if count:
+                    rows.append(_row(since + bucket * step, lo, hi, total / count))
+                bucket = key
+                lo = hi = total = value
+                count = 1
+            else:
+                if value < lo:
+                    lo = value
+                elif value > hi:
+                    hi = value
+                total += value
+                count += 1
+
+        if count:
+            rows.append(_row(since + bucket * step, lo, hi, total / count))
+        return rows
+
+
+def _row(timestamp, lo, hi, avg):
+    return [timestamp, round(lo, 3), round(hi, 3), round(avg, 3)]
@@ -0,0 +1,232 @@
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+from pathlib import Path
+
+
+RAW = struct.Struct("<IHf")  # timestamp, metric id, value
+ROLLUP = struct.Struct("<IHHfff")  # bucket start, metric id, samples, min, max, avg
+
+DAY = 24 * 60 * 60
+
+# bucket: seconds per record, segment: seconds per file, retention: seconds
+# before a segment is deleted (None keeps it forever).
+Tier = namedtuple("Tier", "name bucket segment retention record")
+
+TIERS = (
+    Tier("raw", 1, 60 * 60, DAY, RAW),
+    Tier("1m", 60, DAY, 31 * DAY, ROLLUP),
+    Tier("1h", 60 * 60, 30 * DAY, None, ROLLUP),
+)
+
+
+def _rows(records, since, step):
+    """Combine (timestamp, count, min, max, avg) records into step buckets."""
+    rows = []
+    bucket = None
+    low = high = total = 0.0
+    count = 0
+    for timestamp, n, lo, hi, avg in records:
+        key = int((timestamp - since) // step)
+        if key != bucket:
+            if count:
+                rows.append(_row(since + bucket * step, low, high, total / count))
+            bucket, count, low, high, total = key, 0, lo, hi, 0.0
+        low = min(low, lo)
+        high = max(high, hi)
+        total += avg * n
+        count += n
+    if count:
+        rows.append(_row(since + bucket * step, low, high, total / count))
+    return rows
+
+
+def _row(timestamp, lo, hi, avg):
+    return [timestamp, round(lo, 3), round(hi, 3), round(avg, 3)]
+
+
+class MetricStore:
+    """
+    Append-only on-disk metric history.
+
+    Each tier is a folder of fixed-width record files, one per `segment`
+    seconds and named after the segment's start time. Records are written in
+    time order, so reads mmap the overlapping segments and binary-search to
+    the first record they need. `rollup` folds completed raw seconds into
+    minute records and minutes into hours, then drops segments past their
+    tier's retention.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        for tier in TIERS:
+            (self.root / tier.name).mkdir(parents=True, exist_ok=True)
+
+        self.metrics_path = self.root / "metrics.json"
+        self.metric_ids = {}
+        if self.metrics_path.exists():
+            self.metric_ids = json.loads(self.metrics_path.read_text(encoding="utf-8"))
+
+    def metric_id(self, name, create=False):
+        metric_id = self.metric_ids.get(name)
+        if metric_id is None and create:
+            metric_id = len(self.metric_ids)
+            self.metric_ids[name] = metric_id
+            tmp_path = self.metrics_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.metric_ids), encoding="utf-8")
+            os.replace(tmp_path, self.metrics_path)
+        return metric_id
+
+    def _segment_path(self, tier, timestamp):
+        start = timestamp - timestamp % tier.segment
+        return self.root / tier.name / f"{start:010d}.seg"
+
+    def _write(self, tier, records):
+        """Append packed records, grouped by segment, to the tier's files."""
+        by_segment = {}
+        for record in records:
+            path = self._segment_path(tier, record[0])
+            by_segment.setdefault(path, bytearray()).extend(tier.record.pack(*record))
+
+        for path, data in by_segment.items():
+            with open(path, "ab") as f:
+                f.write(data)
+
+    def append(self, batch):
+        """Write a batch of (timestamp, {metric: value}) samples to the raw tier."""
+        records = []
+        for timestamp, samples in batch:
+            for name, value in samples.items():
+                records.append((int(timestamp), self.metric_id(name, create=True), value))
+        self._write(TIERS[0], records)
+
+    def _segments(self, tier, since, until):
+        folder = self.root / tier.name
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".seg"):
+                continue
+            start = int(name[:-4])
+            if start + tier.segment > since and start < until:
+                yield folder / name
+
+    def _scan(self, tier, since, until, metric_id=None):
+        """
+        Yield (timestamp, metric id, count, min, max, avg) for records in
+        [since, until), optionally for one metric only.
+        """
+        size = tier.record.size
+        for path in self._segments(tier, since, until):
+            with open(path, "rb") as f:
+                length = os.fstat(f.fileno()).st_size // size * size
+                if not length:
+                    continue
+                with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ) as mm:
+                    lo, hi = 0, length // size
+                    while lo < hi:
+                        mid = (lo + hi) // 2
+                        if tier.record.unpack_from(mm, mid * size)[0] < since:
+                            lo = mid + 1
+                        else:
+                            hi = mid
+
+                    view = memoryview(mm)[lo * size:length]
+                    try:
+                        for record in tier.record.iter_unpack(view):
+                            if record[0] >= until:
+                                break
+                            if metric_id is not None and record[1] != metric_id:
+                                continue
+                            if tier.record is RAW:
+                                yield record[0], record[1], 1, record[2], record[2], record[2]
+                            else:
+                                yield record
+                    finally:
+                        view.release()
+
+    def _last_timestamp(self, tier):
+        folder = self.root / tier.name
+        for name in sorted(os.listdir(folder), reverse=True):
+            if not name.endswith(".seg"):
+                continue
+            path = folder / name
+            size = path.stat().st_size // tier.record.size * tier.record.size
+            if size:
+                with open(path, "rb") as f:
+                    f.seek(size - tier.record.size)
+                    return tier.record.unpack(f.read(tier.record.size))[0]
+        return None
+
+    def _rollup(self, source, target, now):
+        last = self._last_timestamp(target)
+        if last is not None:
+            start = last + target.bucket
+        else:
+            first = next(self._scan(source, 0, now), None)
+            if first is None:
+                return
+            start = first[0] - first[0] % target.bucket
+        end = int(now) - int(now) % target.bucket
+        if start >= end:
+            return
+
+        buckets = {}
+        for timestamp, metric_id, count, lo, hi, avg in self._scan(source, start, end):
+            key = (timestamp - timestamp % target.bucket, metric_id)
+            acc = buckets.get(key)
+            if acc is None:
+                buckets[key] = [count, lo, hi, avg * count]
+            else:
+                acc[0] += count
+                acc[1] = min(acc[1], lo)
+                acc[2] = max(acc[2], hi)
+                acc[3] += avg * count
+
+        self._write(
+            target,
+            [
+                (bucket, metric_id, min(count, 0xFFFF), lo, hi, total / count)
+                for (bucket, metric_id), (count, lo, hi, total) in sorted(buckets.items())
+            ],
+        )
+
+    def _prune(self, tier, now):
+        if tier.retention is None:
+            return
+        folder = self.root / tier.name
+        for name in os.listdir(folder):
+            if name.endswith(".seg") and int(name[:-4]) + tier.segment <= now - tier.retention:
+                os.remove(folder / name)
+
+    def rollup(self, now):
+        """Roll completed buckets up the tiers and drop expired segments."""
+        for source, target in zip(TIERS, TIERS[1:]):
+            self._rollup(source, target, now)
+        for tier in TIERS:
+            self._prune(tier, now)
+
+    def query(self, metric, since, until, step):
+        """
+        Return [bucket start, min, max, avg] rows for `metric`, reading the
+        coarsest tier that still has buckets no wider than `step` and keeps
+        data back to `since`.
+        """
+        metric_id = self.metric_id(metric)
+        if metric_id is None:
+            return []
+
+        tier = TIERS[-1]
+        for candidate in reversed(TIERS):
+            covers = candidate.retention is None or since >= until - candidate.retention
+            if candidate.bucket <= step and covers:
+                tier = candidate
+                break
+
+        records = (
+            (timestamp, count, lo, hi, avg)
+            for timestamp, _, count, lo, hi, avg in self._scan(
+                tier, int(since), until, metric_id
+            )
+        )
+        return _rows(records, since, max(step, tier.bucket))
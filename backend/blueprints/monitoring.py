@@ -1,7 +1,9 @@
 import eventlet
 
 eventlet.monkey_patch()
+from eventlet import tpool
 from flask import Blueprint, jsonify, request
+from flask_socketio import join_room, leave_room
 from dotenv import load_dotenv
 import urllib3
 import os
@@ -9,8 +11,24 @@ import platform
 from wakeonlan import send_magic_packet
 import subprocess
 import time
+import math
+import random
 import re
 import json
+from collections import deque
+
+from .host_registry import DEFAULT_HOST_NAME, Host, load_hosts
+from .metric_history import MetricHistory
+from .metric_store import MetricStore
+from .ohm_parser import parse_ohm_stream
+from .subscriptions import (
+    METRIC_GROUPS,
+    WIRE_FORMATS,
+    Subscription,
+    parse_groups,
+    select_groups,
+)
+from .wire_format import PackedSchema
 
 
 monitoring = Blueprint("monitoring", __name__)
@@ -19,18 +37,122 @@ load_dotenv()
 MONITORED_PC_IP = os.getenv("MONITORED_PC_IP")
 MONITORED_PC_MAC = os.getenv("MONITORED_PC_MAC")
 
-OHM_API_URL = f"http://{MONITORED_PC_IP}:8085/data.json"
-
 RAW_MONITORED_DISKS = os.getenv("MONITORED_DISKS", "")
 MONITORED_DISKS = [d.strip() for d in RAW_MONITORED_DISKS.split(",") if d.strip()]
 
+# Network adapters (node Text, e.g. "Ethernet") whose throughput to report.
+# Only LibreHardwareMonitor exposes these.
+RAW_MONITORED_NETWORK = os.getenv("MONITORED_NETWORK", "")
+MONITORED_NETWORK = [n.strip() for n in RAW_MONITORED_NETWORK.split(",") if n.strip()]
+
+# Extra PCs to monitor (see host_registry.load_hosts for the format). The PC
+# from .env is the "default" host.
+MONITORED_HOSTS_FILE = os.getenv("MONITORED_HOSTS_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hosts.json"
+)
+
 UPDATE_INTERVAL = 1
 FETCH_NETWORK_EVERY_N_LOOPS = 3
+FETCH_DISKS_EVERY_N_LOOPS = 5
+
+# Fastest cadence per metric group, in host ticks; subscriptions asking for
+# more are capped to it. Unlisted groups may update every tick.
+GROUP_MIN_LOOPS = {
+    "disks": FETCH_DISKS_EVERY_N_LOOPS,
+    "network": FETCH_NETWORK_EVERY_N_LOOPS,
+}
+
+# While a host's OHM is unreachable, retry after interval * 2^n seconds
+# (jittered, up to OHM_BACKOFF_MAX seconds).
+OHM_BACKOFF_MAX = 30
+
+# "json" parses the whole data.json; "stream" parses the response as it
+# arrives and only builds the sensors listed below.
+OHM_PARSE_MODE = os.getenv("OHM_PARSE_MODE", "json")
+OHM_STREAM_CHUNK_SIZE = 16 * 1024
+
+# Stat key -> (sensor Text, parent Text) as passed to extract_sensor_value.
+STAT_SENSORS = {
+    "cpu_usage": ("CPU Total", "Load"),
+    "cpu_temp": ("CPU Package", "Temperatures"),
+    "cpu_power": ("CPU Package", "Powers"),
+    "gpu_usage": ("GPU Core", "Load"),
+    "gpu_temp": ("GPU Core", "Temperatures"),
+    "gpu_power": ("GPU Power", "Powers"),
+    "ram_usage_gb": ("Used Memory", "Data"),
+}
+DISK_SENSOR = ("Used Space", "Load")
+# Network stat field -> (sensor Text, parent Text) under an adapter node.
+NETWORK_SENSORS = {
+    "upload": ("Upload Speed", "Throughput"),
+    "download": ("Download Speed", "Throughput"),
+}
+
+# Send only stats that moved past these thresholds ("update_stats_delta"),
+# with a full "update_stats" keyframe every N ticks and on connect.
+STATS_DELTA_MODE = os.getenv("STATS_DELTA_MODE", "1") != "0"
+STATS_KEYFRAME_EVERY_N_TICKS = 30
+STAT_DELTA_THRESHOLDS = {
+    "cpu_usage": 1.0,
+    "cpu_temp": 0.5,
+    "cpu_power": 1.0,
+    "gpu_usage": 1.0,
+    "gpu_temp": 0.5,
+    "gpu_power": 1.0,
+    "ram_usage_gb": 0.1,
+}
+DISK_DELTA_THRESHOLD = 0.1
+NETWORK_DELTA_THRESHOLD = 1.0  # KB/s
+
+# In-memory history for /monitoring/history: 24 h at each host's interval
+# (or its "history_seconds"), float32 samples, capped at HISTORY_MAX_BYTES
+# per host.
+HISTORY_SECONDS = 24 * 60 * 60
+HISTORY_MAX_BYTES = 16 * 1024 * 1024
+HISTORY_MAX_POINTS = 2000
+
+# Persistent history (1 s for a day, 1 min for a month, 1 h forever). Samples
+# are queued by background_task and written off the event loop.
+METRIC_STORE_DIR = os.getenv("METRIC_STORE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "metrics"
+)
+METRIC_STORE_FLUSH_INTERVAL = 5
+METRIC_STORE_ROLLUP_INTERVAL = 60
 
 socketio = None
-connected_clients = set()
 
-last_stats = {}
+HOSTS = load_hosts(
+    MONITORED_HOSTS_FILE,
+    Host(
+        DEFAULT_HOST_NAME,
+        MONITORED_PC_IP,
+        mac=MONITORED_PC_MAC,
+        disks=MONITORED_DISKS,
+        network=MONITORED_NETWORK,
+        interval=UPDATE_INTERVAL,
+        history_seconds=HISTORY_SECONDS,
+    ),
+    interval=UPDATE_INTERVAL,
+    history_seconds=HISTORY_SECONDS,
+)
+for _host in HOSTS.values():
+    _host.history = MetricHistory(
+        max(1, int(_host.history_seconds // _host.interval)), HISTORY_MAX_BYTES
+    )
+
+# sid -> (Host, Subscription) the client is in
+client_subscriptions = {}
+
+metric_store = MetricStore(METRIC_STORE_DIR)
+# Room for two flush intervals of samples from every host, so one slow write
+# doesn't drop any. If it fills up, metric_store_task isn't keeping up (or
+# isn't running) and the oldest samples are dropped with a warning.
+pending_samples = deque(
+    maxlen=sum(
+        math.ceil(2 * METRIC_STORE_FLUSH_INTERVAL / host.interval) for host in HOSTS.values()
+    )
+)
+_store_backlog = {"warned": False}
 
 
 def sanitize_ohm_value(value_str):
@@ -51,54 +173,221 @@ def sanitize_ohm_value(value_str):
         return 0.0
 
 
-http = urllib3.PoolManager()
+THROUGHPUT_UNITS = {"B/s": 1 / 1024, "KB/s": 1, "MB/s": 1024, "GB/s": 1024 * 1024}
 
 
-def fetch_ohm_data():
-    """Fetch data from Open Hardware Monitor"""
+def sanitize_throughput(value_str):
+    """Convert strings like '1,5 MB/s' to KB/s (e.g. 1536.0)."""
+    if not value_str:
+        return 0.0
+    unit = value_str.strip().rsplit(" ", 1)[-1]
+    return sanitize_ohm_value(value_str) * THROUGHPUT_UNITS.get(unit, 1)
+
+
+# One connection pool per host, so dozens of hosts don't evict each other.
+http = urllib3.PoolManager(num_pools=max(10, len(HOSTS)))
+
+
+def reload_default_host():
+    """Apply MONITORED_PC_IP/MAC/DISKS changed from the config page to the default host."""
+    host = HOSTS.get(DEFAULT_HOST_NAME)
+    if host is None:
+        print("[WARNING] No default host to update; restart to pick up MONITORED_PC_IP.")
+        return
+
+    host.set_ip(MONITORED_PC_IP)
+    host.mac = MONITORED_PC_MAC or ""
+    if host.disks != MONITORED_DISKS:
+        host.disks = list(MONITORED_DISKS)
+        # Packed clients see the new schema id and subscribe again.
+        for subscription in host.subscriptions.values():
+            if subscription.schema is not None:
+                subscription.schema = packed_schema(host, subscription.groups)
+
+
+def get_host(name=None):
+    """Return the named host, the first registered one if no name is given, or None."""
+    if not name:
+        return next(iter(HOSTS.values()))
+    return HOSTS.get(name)
+
+
+def wanted_ohm_sensors(groups=None):
+    """(parent Text, sensor Text) pairs the stream parser has to keep for `groups` (all by default)."""
+    groups = METRIC_GROUPS if groups is None else groups
+    sensors = [
+        (parent, name)
+        for key, (name, parent) in STAT_SENSORS.items()
+        if any(key in METRIC_GROUPS[group] for group in groups)
+    ]
+    if "disks" in groups:
+        sensors.append((DISK_SENSOR[1], DISK_SENSOR[0]))
+    if "network" in groups:
+        sensors.extend((parent, name) for name, parent in NETWORK_SENSORS.values())
+    return sensors
+
+
+def fetch_ohm_data(host, groups=None):
+    """Fetch data from a host's Open Hardware Monitor (stream mode keeps only `groups`)"""
+    if not host.url:
+        return {"error": f"No IP configured for host '{host.name}'"}
     try:
-        response = http.request("GET", OHM_API_URL, timeout=1.0)
+        if OHM_PARSE_MODE == "stream":
+            response = http.request(
+                "GET", host.url, timeout=1.0, preload_content=False
+            )
+            try:
+                return parse_ohm_stream(
+                    response.stream(OHM_STREAM_CHUNK_SIZE),
+                    wanted_ohm_sensors(groups),
+                    _wanted_nodes(host, groups),
+                )
+            finally:
+                response.release_conn()
+
+        response = http.request("GET", host.url, timeout=1.0)
         return json.loads(response.data.decode("utf-8"))
     except Exception as e:
         return {"error": str(e)}
 
 
-def extract_sensor_value(
-    data, sensor_name, required_parent_text=None, parent_text=None
-):
-    """Extract a raw sensor string (like '15,0 %') from the OHM JSON."""
-    for child in data.get("Children", []):
-        val = extract_sensor_value(
-            child, sensor_name, required_parent_text, parent_text=data.get("Text", "")
-        )
-        if val is not None:
-            return val
+# Cached (parent Text, sensor Text) / node Text -> child-index path lookups,
+# keyed by the shape of the OHM tree so hosts with different hardware each
+# keep their own. `_current_index` remembers the last response looked up, so
+# each fetch is checked against the signatures once.
+SENSOR_INDEX_CACHE_SIZE = 64
+_sensor_indexes = {}
+_current_index = {"tree": None, "index": None}
+
+
+def _tree_signature(node, depth=0, max_depth=3):
+    """
+    Describe the shape of the top of the OHM tree (root, computer, hardware and
+    sensor groups) as nested (Text, child count) tuples. Hardware or sensors
+    appearing or disappearing changes the signature.
+    """
+    children = node.get("Children", [])
+    if depth >= max_depth:
+        return (node.get("Text"), len(children))
+    return (
+        node.get("Text"),
+        tuple(_tree_signature(child, depth + 1, max_depth) for child in children),
+    )
+
+
+def build_sensor_index(data):
+    """
+    Walk the OHM tree once and record the child-index path of every node.
+
+    `sensors` is keyed by (parent Text, Text) and (None, Text) in the same
+    post-order the old recursive search used, `nodes` by Text in pre-order,
+    so lookups return the same node a full tree walk would have found.
+    """
+    sensors = {}
+    nodes = {}
+
+    def visit(node, path, parent_text):
+        text = node.get("Text")
+        nodes.setdefault(text, path)
+        for i, child in enumerate(node.get("Children", [])):
+            visit(child, path + (i,), text)
+        sensors.setdefault((parent_text, text), path)
+        sensors.setdefault((None, text), path)
+
+    visit(data, (), None)
+    return {
+        "signature": _tree_signature(data),
+        "sensors": sensors,
+        "nodes": nodes,
+    }
+
+
+def get_sensor_index(data, rebuild=False):
+    """Return the cached sensor index for the tree's shape, building it if needed."""
+    if not rebuild and _current_index["tree"] is data:
+        return _current_index["index"]
+
+    signature = _tree_signature(data)
+    index = None if rebuild else _sensor_indexes.get(signature)
+    if index is None:
+        index = build_sensor_index(data)
+        if len(_sensor_indexes) >= SENSOR_INDEX_CACHE_SIZE:
+            _sensor_indexes.clear()
+        _sensor_indexes[signature] = index
+
+    _current_index["tree"] = data
+    _current_index["index"] = index
+    return index
+
+
+def _resolve_path(data, path, text):
+    """Follow a child-index path, returning None if it no longer leads to `text`."""
+    node = data
+    try:
+        for i in path:
+            node = node["Children"][i]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return node if node.get("Text") == text else None
+
 
-    if data.get("Text") == sensor_name:
-        if required_parent_text is not None:
-            if parent_text != required_parent_text:
-                return None
-        return data.get("Value", "N/A")
+def _lookup(data, table, key, text):
+    path = get_sensor_index(data)[table].get(key)
+    if path is None:
+        return None
 
-    return None
+    node = _resolve_path(data, path, text)
+    if node is None:
+        # Same shape, different layout (e.g. sensors reordered): reindex once.
+        path = get_sensor_index(data, rebuild=True)[table].get(key)
+        node = _resolve_path(data, path, text) if path is not None else None
+    return node
+
+
+def extract_sensor_value(data, sensor_name, required_parent_text=None):
+    """Extract a raw sensor string (like '15,0 %') from the OHM JSON."""
+    node = _lookup(data, "sensors", (required_parent_text, sensor_name), sensor_name)
+    if node is None:
+        return None
+    return node.get("Value", "N/A")
 
 
 def find_node_by_text(node, text):
-    """Recursively find a node by its 'Text' field."""
-    if node.get("Text") == text:
-        return node
+    """Find a node anywhere in the OHM tree by its 'Text' field."""
+    return _lookup(node, "nodes", text, text)
 
-    for child in node.get("Children", []):
-        found = find_node_by_text(child, text)
-        if found:
-            return found
 
-    return None
+def _wanted_nodes(host, groups=None):
+    nodes = []
+    if groups is None or "disks" in groups:
+        nodes.extend(host.disks)
+    if groups is None or "network" in groups:
+        nodes.extend(host.network)
+    return nodes
+
+
+def get_network_speeds(data, adapter_name):
+    """
+    Find a network adapter node named `adapter_name` and return its
+    {"upload": ..., "download": ...} throughput strings ('N/A' if missing).
+    """
+    speeds = {field: "N/A" for field in NETWORK_SENSORS}
+    adapter_node = find_node_by_text(data, adapter_name)
+    if not adapter_node:
+        print(f"[ERROR] Network adapter '{adapter_name}' not found in JSON.")
+        return speeds
+
+    for group in adapter_node.get("Children", []):
+        for sensor in group.get("Children", []):
+            for field, (name, parent) in NETWORK_SENSORS.items():
+                if group.get("Text") == parent and sensor.get("Text") == name:
+                    speeds[field] = sensor.get("Value", "N/A")
+    return speeds
 
 
 def get_disk_used_space(data, disk_name):
     """
-    Recursively find a disk node named `disk_name` anywhere in `data`,
+    Find a disk node named `disk_name` anywhere in `data`,
     then locate 'Load' -> 'Used Space'.
     """
     disk_node = find_node_by_text(data, disk_name)
@@ -106,11 +395,12 @@ def get_disk_used_space(data, disk_name):
         print(f"[ERROR] Disk '{disk_name}' not found in JSON.")
         return "N/A"
 
+    used_space_name, load_name = DISK_SENSOR
     load_node = next(
         (
             child
             for child in disk_node.get("Children", [])
-            if child.get("Text") == "Load"
+            if child.get("Text") == load_name
         ),
         None,
     )
@@ -122,7 +412,7 @@ def get_disk_used_space(data, disk_name):
         (
             child
             for child in load_node.get("Children", [])
-            if child.get("Text") == "Used Space"
+            if child.get("Text") == used_space_name
         ),
         None,
     )
@@ -134,11 +424,30 @@ def get_disk_used_space(data, disk_name):
     return raw_value
 
 
+def _requested_host():
+    """The host named by the `host` query parameter (default host if absent), or None."""
+    return get_host(request.args.get("host"))
+
+
+def _unknown_host():
+    return jsonify({"error": f"Unknown host '{request.args.get('host')}'"}), 404
+
+
+@monitoring.route("/hosts", methods=["GET"])
+def list_hosts():
+    """List the monitored hosts; the first one is the default."""
+    return jsonify([host.describe() for host in HOSTS.values()])
+
+
 @monitoring.route("/wake", methods=["POST"])
 def wake_pc():
-    """Send a magic packet to wake up the monitored PC."""
-    if MONITORED_PC_MAC:
-        send_magic_packet(MONITORED_PC_MAC)
+    """Send a magic packet to wake up a monitored PC (?host=<name>)."""
+    host = _requested_host()
+    if host is None:
+        return _unknown_host()
+
+    if host.mac:
+        send_magic_packet(host.mac)
         return jsonify({"status": "Magic packet sent!"})
     else:
         return jsonify({"error": "MAC address not configured"}), 400
@@ -146,15 +455,18 @@ def wake_pc():
 
 @monitoring.route("/ping", methods=["GET"])
 def ping():
-    """Ping the monitored PC and return online/offline status."""
-    if not MONITORED_PC_IP:
+    """Ping a monitored PC (?host=<name>) and return online/offline status."""
+    host = _requested_host()
+    if host is None:
+        return _unknown_host()
+    if not host.ip:
         return jsonify({"error": "MONITORED_PC_IP not configured"}), 400
 
     def check_ping():
         param = "-n" if platform.system().lower() == "windows" else "-c"
         try:
             result = subprocess.run(
-                ["ping", param, "2", MONITORED_PC_IP],
+                ["ping", param, "2", host.ip],
                 capture_output=True,
                 text=True,
                 timeout=3,
@@ -177,7 +489,11 @@ def ping():
 @monitoring.route("/stats", methods=["GET"])
 def get_stats():
     """Return minimal info so the frontend can confirm Open Hardware Monitor is alive."""
-    ohm_data = fetch_ohm_data()
+    host = _requested_host()
+    if host is None:
+        return _unknown_host()
+
+    ohm_data = fetch_ohm_data(host)
     if "error" in ohm_data:
         return jsonify({"error": ohm_data["error"]}), 500
 
@@ -191,64 +507,321 @@ def get_stats():
     return jsonify({"cpu_usage": cpu_usage_str, "cpu_temp": cpu_temp_str}), 200
 
 
-def background_task():
+def collect_stats(ohm_data, host, groups=None):
+    """Extract and sanitize a host's stats for `groups` (all by default) from an OHM tree."""
+    groups = METRIC_GROUPS if groups is None else groups
+    keys = {key for group in groups for key in METRIC_GROUPS[group]}
+
+    stats = {
+        key: sanitize_ohm_value(extract_sensor_value(ohm_data, name, parent))
+        for key, (name, parent) in STAT_SENSORS.items()
+        if key in keys
+    }
+    if "disks" in keys:
+        stats["disks"] = {
+            disk_name: sanitize_ohm_value(get_disk_used_space(ohm_data, disk_name))
+            for disk_name in host.disks
+        }
+    if "network" in keys:
+        stats["network"] = {
+            adapter: {
+                field: sanitize_throughput(value)
+                for field, value in get_network_speeds(ohm_data, adapter).items()
+            }
+            for adapter in host.network
+        }
+    return stats
+
+
+def history_samples(stats):
+    """
+    Flatten a stats dict into history metric names ("disk:<name>" for disks,
+    "net_upload:<adapter>"/"net_download:<adapter>" for network).
+    """
+    samples = {key: value for key, value in stats.items() if key not in ("disks", "network")}
+    for name, value in stats.get("disks", {}).items():
+        samples[f"disk:{name}"] = value
+    for adapter, speeds in stats.get("network", {}).items():
+        for field, value in speeds.items():
+            samples[f"net_{field}:{adapter}"] = value
+    return samples
+
+
+def _host_store_metrics(host):
+    """Names of the host's metrics in the metric store, without the host prefix."""
+    # metric_store_task adds names from a native thread; copy the keys in one go.
+    names = list(metric_store.metric_ids)
+    prefix = host.metric_prefix
+    if prefix:
+        return {name[len(prefix):] for name in names if name.startswith(prefix)}
+    return {name for name in names if "/" not in name}
+
+
+@monitoring.route("/history", methods=["GET"])
+def get_history():
+    """
+    Return min/max/avg rows for one metric, e.g.
+    /history?metric=cpu_temp&since=-600&step=10 (a negative `since` is
+    relative to now, otherwise it's a Unix timestamp; `step` is in seconds).
+    Pass `host=<name>` for hosts other than the default one.
+    """
+    host = _requested_host()
+    if host is None:
+        return _unknown_host()
+
+    history = host.history
+    metric = request.args.get("metric")
+    store_metric = host.metric_prefix + (metric or "")
+    if not metric:
+        metrics = sorted(set(history.values) | _host_store_metrics(host))
+        return jsonify({"error": "No metric provided", "metrics": metrics}), 400
+    if metric not in history.values and metric_store.metric_id(store_metric) is None:
+        return jsonify({"error": f"No history for metric '{metric}'"}), 404
+
+    now = time.time()
+    try:
+        since = float(request.args.get("since", -3600))
+        step = float(request.args.get("step", 60))
+    except ValueError:
+        return jsonify({"error": "Invalid since/step value"}), 400
+
+    if since < 0:
+        since += now
+    step = max(step, host.interval, (now - since) / HISTORY_MAX_POINTS)
+
+    # Memory covers the recent past since startup; older ranges come from
+    # disk, split on a bucket boundary so no bucket is counted twice.
+    oldest = history.oldest()
+    if oldest is None or metric not in history.values:
+        points = tpool.execute(metric_store.query, store_metric, since, now, step)
+    elif since >= oldest:
+        points = history.query(metric, since, step)
+    else:
+        cut = since + math.ceil((oldest - since) / step) * step
+        points = tpool.execute(metric_store.query, store_metric, since, cut, step)
+        points += [row for row in history.query(metric, since, step) if row[0] >= cut]
+
+    return jsonify(
+        {"host": host.name, "metric": metric, "since": since, "step": step, "points": points}
+    )
+
+
+def _moved(previous, value, threshold):
+    return previous is None or (value != previous and abs(value - previous) >= threshold)
+
+
+def _network_moved(previous, speeds):
+    return previous is None or any(
+        _moved(previous.get(field), value, NETWORK_DELTA_THRESHOLD)
+        for field, value in speeds.items()
+    )
+
+
+def diff_stats(sent, stats):
     """
-    Continuously fetch data and send updates via WebSockets.
+    Return the fields of `stats` that moved past their threshold since `sent`,
+    the state clients were last brought to.
     """
-    global last_stats
+    delta = {
+        key: value
+        for key, value in stats.items()
+        if key not in ("disks", "network")
+        and _moved(sent.get(key), value, STAT_DELTA_THRESHOLDS.get(key, 0.0))
+    }
+
+    sent_disks = sent.get("disks", {})
+    disks = {
+        name: value
+        for name, value in stats.get("disks", {}).items()
+        if _moved(sent_disks.get(name), value, DISK_DELTA_THRESHOLD)
+    }
+    if disks:
+        delta["disks"] = disks
+
+    sent_network = sent.get("network", {})
+    network = {
+        adapter: speeds
+        for adapter, speeds in stats.get("network", {}).items()
+        if _network_moved(sent_network.get(adapter), speeds)
+    }
+    if network:
+        delta["network"] = network
+    return delta
+
+
+def _names_changed(sent, stats):
+    """True if a disk or network adapter appeared or disappeared since `sent`."""
+    return any(
+        key in stats and (key not in sent or sent[key].keys() != stats[key].keys())
+        for key in ("disks", "network")
+    )
 
-    loop_counter = 0
 
-    while True:
-        try:
-            if not socketio:
-                time.sleep(1)
-                continue
+def packed_schema(host, groups):
+    """Packed wire format schema: the history names of the groups' fields."""
+    template = {key: 0.0 for group in groups for key in METRIC_GROUPS[group]}
+    if "disks" in template:
+        template["disks"] = {name: 0.0 for name in host.disks}
+    if "network" in template:
+        template["network"] = {
+            adapter: {field: 0.0 for field in NETWORK_SENSORS} for adapter in host.network
+        }
+    return PackedSchema(history_samples(template))
 
-            if not connected_clients:
-                time.sleep(2)
-                continue
 
-            loop_counter += 1
+def emit_stats(subscription, event, stats, to):
+    """
+    Emit `stats` in the subscription's wire format. Packed updates have no
+    keyframe/delta distinction, both are "update_stats_packed".
+    """
+    if subscription.schema is not None:
+        socketio.emit(
+            "update_stats_packed", subscription.schema.pack(history_samples(stats)), to=to
+        )
+    else:
+        socketio.emit(event, stats, to=to)
+
 
-            # Always fetch OHM
-            ohm_data = fetch_ohm_data()
-            if "error" in ohm_data:
-                print("[WARNING] OHM fetch failed:", ohm_data["error"])
-                time.sleep(1)
+def send_update(subscription, stats):
+    """
+    Send `stats` (this tick's values for the subscription's due groups) to its
+    room, once for all of its clients: a full "update_stats" keyframe every
+    STATS_KEYFRAME_EVERY_N_TICKS sends, otherwise an "update_stats_delta".
+    """
+    sent = subscription.sent
+    subscription.emits += 1
+
+    if (
+        not STATS_DELTA_MODE
+        or not sent
+        or subscription.emits % STATS_KEYFRAME_EVERY_N_TICKS == 0
+        or any(key not in sent for key in stats)
+        or _names_changed(sent, stats)
+    ):
+        emit_stats(subscription, "update_stats", stats, subscription.room)
+        for key, value in stats.items():
+            sent[key] = dict(value) if isinstance(value, dict) else value
+        return
+
+    # Sent even when empty so clients can tell the feed is alive.
+    delta = diff_stats(sent, stats)
+    emit_stats(subscription, "update_stats_delta", delta, subscription.room)
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            sent[key].update(value)
+        else:
+            sent[key] = value
+
+
+def backoff_delay(interval, failures):
+    """Exponential backoff with jitter after `failures` failed fetches in a row."""
+    delay = min(OHM_BACKOFF_MAX, interval * 2 ** (failures - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def wait_for_next_tick(next_tick, interval):
+    """
+    Sleep until `next_tick` + `interval` on the monotonic clock and return
+    that deadline. Ticks are scheduled from the previous deadline rather than
+    after the work, so they don't drift; ticks missed by a slow fetch are
+    skipped instead of being run back to back.
+    """
+    next_tick += interval
+    now = time.monotonic()
+    if next_tick < now:
+        next_tick += math.ceil((now - next_tick) / interval) * interval
+    time.sleep(next_tick - now)
+    return next_tick
+
+
+def host_task(host):
+    """
+    Poll one host's OHM and send its updates to its subscription rooms. Every
+    host runs its own green thread, so a slow or offline host never delays
+    others. Only the groups some subscription is due for are fetched; with no
+    subscribers the loop waits for one instead of polling.
+    """
+    tick = 0
+    failures = 0
+    next_tick = time.monotonic()
+
+    while True:
+        try:
+            if not socketio or not host.clients:
+                host.wakeup.clear()
+                if not host.clients:
+                    host.wakeup.wait(60)
+                next_tick = time.monotonic()
                 continue
 
-            # Extract + sanitize values
-            raw_cpu_usage = extract_sensor_value(ohm_data, "CPU Total", "Load")
-            raw_cpu_temp = extract_sensor_value(ohm_data, "CPU Package", "Temperatures")
-            raw_cpu_power = extract_sensor_value(ohm_data, "CPU Package", "Powers")
-            raw_gpu_usage = extract_sensor_value(ohm_data, "GPU Core", "Load")
-            raw_gpu_temp = extract_sensor_value(ohm_data, "GPU Core", "Temperatures")
-            raw_gpu_power = extract_sensor_value(ohm_data, "GPU Power", "Powers")
-            raw_ram_usage = extract_sensor_value(ohm_data, "Used Memory", "Data")
-
-            disk_stats = {}
-            for disk_name in MONITORED_DISKS:
-                raw_value = get_disk_used_space(ohm_data, disk_name)
-                disk_stats[disk_name] = sanitize_ohm_value(raw_value)
-
-            stats = {
-                "cpu_usage": sanitize_ohm_value(raw_cpu_usage),
-                "cpu_temp": sanitize_ohm_value(raw_cpu_temp),
-                "cpu_power": sanitize_ohm_value(raw_cpu_power),
-                "gpu_usage": sanitize_ohm_value(raw_gpu_usage),
-                "gpu_temp": sanitize_ohm_value(raw_gpu_temp),
-                "gpu_power": sanitize_ohm_value(raw_gpu_power),
-                "ram_usage_gb": sanitize_ohm_value(raw_ram_usage),
-                "disks": disk_stats,
+            tick += 1
+            subscriptions = list(host.subscriptions.values())
+            due = {
+                subscription: subscription.due_groups(tick)
+                for subscription in subscriptions
             }
-
-            socketio.emit("update_stats", stats)
-            time.sleep(UPDATE_INTERVAL)
+            groups = {group for sub_groups in due.values() for group in sub_groups}
+
+            if groups:
+                ohm_data = fetch_ohm_data(host, groups)
+                if "error" in ohm_data:
+                    failures += 1
+                    delay = backoff_delay(host.interval, failures)
+                    print(
+                        f"[WARNING] OHM fetch failed for {host.name}"
+                        f" (retrying in {delay:.1f}s):",
+                        ohm_data["error"],
+                    )
+                    time.sleep(delay)
+                    next_tick = time.monotonic()
+                    continue
+                failures = 0
+
+                stats = collect_stats(ohm_data, host, groups)
+                now = time.time()
+                host.last_stats.update(stats)
+                host.last_update = now
+                samples = history_samples(stats)
+                host.history.append(now, samples)
+                if host.metric_prefix:
+                    samples = {host.metric_prefix + key: value for key, value in samples.items()}
+                if len(pending_samples) == pending_samples.maxlen and not _store_backlog["warned"]:
+                    print("[WARNING] Metric store is not draining samples; dropping the oldest")
+                    _store_backlog["warned"] = True
+                pending_samples.append((now, samples))
+
+                for subscription, sub_groups in due.items():
+                    if sub_groups and subscription.sids:
+                        send_update(subscription, select_groups(stats, sub_groups))
+
+            next_tick = wait_for_next_tick(next_tick, host.interval)
 
         except Exception as e:
-            print("[ERROR] Unexpected exception in background_task:", str(e))
+            print(f"[ERROR] Unexpected exception in host_task ({host.name}):", str(e))
             time.sleep(1)
+            next_tick = time.monotonic()
+
+
+def metric_store_task():
+    """Flush queued samples to the metric store and roll them up, in a native thread."""
+    last_rollup = 0
+
+    while True:
+        time.sleep(METRIC_STORE_FLUSH_INTERVAL)
+        try:
+            batch = []
+            while pending_samples:
+                batch.append(pending_samples.popleft())
+            if batch:
+                tpool.execute(metric_store.append, batch)
+                _store_backlog["warned"] = False
+
+            now = time.time()
+            if now - last_rollup >= METRIC_STORE_ROLLUP_INTERVAL:
+                tpool.execute(metric_store.rollup, now)
+                last_rollup = now
+        except Exception as e:
+            print("[ERROR] Metric store update failed:", str(e))
 
 
 def setup_socketio(sio):
@@ -256,14 +829,85 @@ def setup_socketio(sio):
     global socketio
     socketio = sio
 
+    def unsubscribe(sid):
+        host, subscription = client_subscriptions.pop(sid, (None, None))
+        if subscription is None:
+            return
+        host.clients.discard(sid)
+        subscription.sids.discard(sid)
+        leave_room(subscription.room)
+        if not subscription.sids:
+            host.subscriptions.pop(subscription.room, None)
+
+    def subscribe(sid, host, groups, wire_format="json"):
+        unsubscribe(sid)
+        probe = Subscription(host, groups, wire_format)
+        subscription = host.subscriptions.get(probe.room)
+        if subscription is None:
+            subscription = host.subscriptions[probe.room] = probe
+            if wire_format == "packed":
+                subscription.schema = packed_schema(host, groups)
+        subscription.sids.add(sid)
+        host.clients.add(sid)
+        client_subscriptions[sid] = (host, subscription)
+        join_room(subscription.room)
+        host.wakeup.set()
+
+        if subscription.schema is not None:
+            socketio.emit("stats_schema", subscription.schema.describe(), to=sid)
+        current = select_groups(host.last_stats, groups)
+        if current:
+            # Keyframe so a (re)connecting client never applies deltas to stale values.
+            emit_stats(subscription, "update_stats", current, sid)
+        return subscription
+
     @socketio.on("connect")
     def handle_connect():
-        connected_clients.add(request.sid)
-        print("Client connected")
+        # Clients pick a host with io(url, {query: {host: "<name>"}}) and
+        # start out subscribed to every group at the host's rate.
+        host = _requested_host() or get_host()
+        subscribe(
+            request.sid,
+            host,
+            {group: GROUP_MIN_LOOPS.get(group, 1) for group in METRIC_GROUPS},
+        )
+        print(f"Client connected ({host.name})")
+
+    @socketio.on("subscribe")
+    def handle_subscribe(data):
+        """
+        {"host": "<name>", "groups": {"cpu": 1, "disks": 0.2}} (rates in Hz)
+        or {"groups": ["cpu", "gpu"]}; replaces the client's subscription.
+        Add "format": "packed" for binary updates (see wire_format.py).
+        """
+        data = data if isinstance(data, dict) else {}
+        if data.get("host"):
+            host = get_host(data["host"])
+            if host is None:
+                return {"error": f"Unknown host '{data['host']}'"}
+        else:
+            current = client_subscriptions.get(request.sid)
+            host = current[0] if current else get_host()
+
+        wire_format = data.get("format") or "json"
+        if wire_format not in WIRE_FORMATS:
+            return {"error": f"Unknown format '{wire_format}'"}
+        try:
+            groups = parse_groups(data.get("groups"), host.interval, GROUP_MIN_LOOPS)
+        except ValueError as e:
+            return {"error": str(e)}
+
+        subscription = subscribe(request.sid, host, groups, wire_format)
+        reply = {"host": host.name, "groups": subscription.rates(host.interval)}
+        if subscription.schema is not None:
+            reply["schema"] = subscription.schema.describe()
+        return reply
 
     @socketio.on("disconnect")
     def handle_disconnect():
-        connected_clients.discard(request.sid)
+        unsubscribe(request.sid)
         print("Client disconnected")
 
-    socketio.start_background_task(background_task)
+    for host in HOSTS.values():
+        socketio.start_background_task(host_task, host)
+    socketio.start_background_task(metric_store_task)
@@ -0,0 +1,174 @@
+import json
+import re
+
+
+# Group nodes Open Hardware Monitor (and LibreHardwareMonitor) put between a
+# hardware node and its sensors, one per sensor type.
+SENSOR_GROUPS = frozenset(
+    {
+        "Voltages",
+        "Currents",
+        "Clocks",
+        "Temperatures",
+        "Load",
+        "Fans",
+        "Flows",
+        "Controls",
+        "Levels",
+        "Factors",
+        "Powers",
+        "Data",
+        "Throughput",
+        "Energy",
+        "Noise",
+    }
+)
+
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+# Anything up to the next object brace; strings are consumed whole so braces
+# inside them never count.
+_FILL = re.compile(rb'[^"{}]*(?:' + _STRING + rb'[^"{}]*)*')
+_TEXT = re.compile(rb'"Text"\s*:\s*(' + _STRING + rb")")
+_VALUE = re.compile(rb'"Value"\s*:\s*(' + _STRING + rb")")
+
+_OPEN = ord("{")
+
+
+def _next_brace(buf, pos):
+    """
+    Return the offset of the next '{' or '}' at or after `pos` that is not
+    inside a string, or -1 if it isn't in `buf` yet. `pos` must be outside a
+    string. The quick path only falls back to the string-aware regex when the
+    gap contains an escaped quote or an odd number of quotes.
+    """
+    i = buf.find(b"{", pos)
+    j = buf.find(b"}", pos)
+    if i < 0 or 0 <= j < i:
+        i = j
+    if i < 0:
+        return -1
+
+    if buf.count(b'"', pos, i) % 2 == 0 and (
+        buf.find(b"\\", pos, i) == -1 or buf.find(b'\\"', pos, i) == -1
+    ):
+        return i
+
+    i = _FILL.match(buf, pos).end()
+    return i if i < len(buf) and buf[i] in b"{}" else -1
+
+
+def _member(buf, pattern, start, end):
+    match = pattern.search(buf, start, end)
+    if match is None:
+        return None
+
+    raw = match.group(1)
+    if b"\\" in raw:
+        return json.loads(raw)
+    return raw[1:-1].decode("utf-8")
+
+
+class OhmStreamParser:
+    """
+    Incrementally parse an OHM data.json body, building only the nodes needed.
+
+    `wanted_sensors` is a collection of (parent Text, sensor Text) pairs and
+    `wanted_nodes` a collection of node Texts (e.g. disks) to keep. Hardware
+    nodes are always kept; sensor groups that can't contain a wanted sensor
+    are skipped without being materialised, and sensors that aren't wanted
+    are dropped as soon as their object has been matched. The result has the
+    same {"Text", "Value", "Children"} shape as the full tree, pruned.
+    """
+
+    def __init__(self, wanted_sensors, wanted_nodes=()):
+        self.wanted_sensors = frozenset(wanted_sensors)
+        self.wanted_parents = frozenset(parent for parent, _ in self.wanted_sensors)
+        self.wanted_nodes = frozenset(wanted_nodes)
+
+        self._buf = b""
+        self._stack = []
+        self._skip_depth = 0
+        self._root = None
+
+    def feed(self, chunk):
+        """Consume the next chunk of the response body."""
+        buf = self._buf + chunk if self._buf else chunk
+        self._buf = buf[self._consume(buf):]
+
+    def close(self):
+        """Finish parsing and return the pruned tree."""
+        rest = self._buf[self._consume(self._buf):]
+        if rest.strip() or self._stack or self._root is None:
+            raise ValueError("Incomplete OHM JSON document")
+        self._buf = b""
+        return self._root
+
+    def _consume(self, buf):
+        """Process every complete object boundary in `buf`, returning the offset reached."""
+        pos = 0
+        stack = self._stack
+
+        while True:
+            i = _next_brace(buf, pos)
+            if i < 0:
+                break
+
+            if self._skip_depth:
+                self._skip_depth += 1 if buf[i] == _OPEN else -1
+                if not self._skip_depth:
+                    stack.pop()
+                pos = i + 1
+                continue
+
+            if buf[i] != _OPEN:
+                if not stack:
+                    raise ValueError("Unbalanced '}' in OHM JSON")
+                node = stack.pop()
+                if stack:
+                    stack[-1]["Children"].append(node)
+                else:
+                    self._root = node
+                pos = i + 1
+                continue
+
+            # Object start: the next brace tells a leaf from a node with children.
+            j = _next_brace(buf, i + 1)
+            if j < 0:
+                break
+
+            text = _member(buf, _TEXT, i + 1, j)
+            if buf[j] == _OPEN:
+                # Text precedes Children in both OHM and LHM output.
+                stack.append({"Text": text, "Value": "", "Children": []})
+                if text in SENSOR_GROUPS and text not in self.wanted_parents:
+                    self._skip_depth = 1
+                pos = j
+            else:
+                self._add_leaf(buf, text, i + 1, j)
+                pos = j + 1
+
+        return pos
+
+    def _add_leaf(self, buf, text, start, end):
+        if self._stack:
+            parent_text = self._stack[-1]["Text"]
+            if (parent_text, text) not in self.wanted_sensors and text not in self.wanted_nodes:
+                return
+
+        node = {"Text": text, "Children": []}
+        value = _member(buf, _VALUE, start, end)
+        if value is not None:
+            node["Value"] = value
+
+        if self._stack:
+            self._stack[-1]["Children"].append(node)
+        else:
+            self._root = node
+
+
+def parse_ohm_stream(chunks, wanted_sensors, wanted_nodes=()):
+    """Parse an iterable of data.json byte chunks into a pruned OHM tree."""
+    parser = OhmStreamParser(wanted_sensors, wanted_nodes)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class PlaylistCache:
+    """
+    Playlist tracks keyed by playlist id and validated by Spotify's
+    `snapshot_id`, which changes whenever the playlist does.
+
+    Least recently used playlists are evicted once the cache holds more than
+    `max_tracks` tracks. With a `path`, the cache is loaded from and written
+    back to that JSON file so it survives restarts.
+    """
+
+    def __init__(self, max_tracks, path=None):
+        self.max_tracks = max_tracks
+        self.path = path
+        self.entries = OrderedDict()  # playlist id -> {"snapshot_id", "name", "items"}
+        self.track_count = 0
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, playlist_id, snapshot_id):
+        """The cached entry if it is still at `snapshot_id`, else None."""
+        with self.lock:
+            entry = self.entries.get(playlist_id)
+            if entry is None or entry["snapshot_id"] != snapshot_id:
+                return None
+            self.entries.move_to_end(playlist_id)
+            return entry
+
+    def put(self, playlist_id, snapshot_id, name, items):
+        entry = {"snapshot_id": snapshot_id, "name": name, "items": items}
+        with self.lock:
+            self._insert(playlist_id, entry)
+        if self.path:
+            self.save()
+        return entry
+
+    def invalidate(self, playlist_id):
+        with self.lock:
+            if playlist_id not in self.entries:
+                return
+            self._remove(playlist_id)
+        if self.path:
+            self.save()
+
+    def _insert(self, playlist_id, entry):
+        self._remove(playlist_id)
+        if len(entry["items"]) > self.max_tracks:
+            return
+        self.entries[playlist_id] = entry
+        self.track_count += len(entry["items"])
+        while self.track_count > self.max_tracks:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, playlist_id):
+        entry = self.entries.pop(playlist_id, None)
+        if entry is not None:
+            self.track_count -= len(entry["items"])
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Ignoring playlist cache {self.path}: {e}")
+            return
+
+        # Saved oldest first, so replaying it keeps the LRU order.
+        with self.lock:
+            for playlist_id, entry in saved.items():
+                self._insert(playlist_id, entry)
+
+    def save(self):
+        with self.lock:
+            snapshot = dict(self.entries)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARNING] Failed to save playlist cache {self.path}: {e}")
@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    `rate` requests per second on average, with bursts of up to `burst`.
+    `reserve` books a slot and says how long to wait for it, so callers can
+    decide to sleep or give up instead of blocking inside the bucket.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """
+        Take a token and return the seconds until it is available, or None
+        (taking nothing) if that would be longer than `max_wait`.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+
+def retry_after_seconds(response, default=1.0):
+    """Seconds from a 429's Retry-After header (Spotify sends whole seconds)."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
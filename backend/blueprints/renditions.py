@@ -0,0 +1,89 @@
+import shutil
+import subprocess
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+VIDEO_EXTENSIONS = (".mp4", ".webm")
+
+# Bounding boxes: the slideshow screen is 1024x600, the upload page's
+# previews are 180x120 (drawn with object-fit: cover, hence the height).
+RENDITION_SIZES = {
+    "display": (1024, 600),
+    "poster": (1024, 600),
+    "thumb": (360, 240),
+}
+
+if features.check("webp"):
+    RENDITION_FORMAT, RENDITION_EXTENSION, RENDITION_MIMETYPE = "WEBP", "webp", "image/webp"
+else:
+    RENDITION_FORMAT, RENDITION_EXTENSION, RENDITION_MIMETYPE = "JPEG", "jpg", "image/jpeg"
+RENDITION_QUALITY = 80
+
+# Poster frames need ffmpeg; without it videos just have no poster/thumb.
+FFMPEG = shutil.which("ffmpeg")
+POSTER_SEEK_SECONDS = 1
+POSTER_TIMEOUT = 30
+
+
+def is_video(filename):
+    return filename.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def can_render(filename, kind):
+    """Whether a `kind` rendition of `filename` can exist at all."""
+    if kind not in RENDITION_SIZES:
+        return False
+    if is_video(filename):
+        return kind != "display" and FFMPEG is not None
+    return kind != "poster" and filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def poster_frame(path):
+    """PNG bytes of a frame near the start of the video at `path`, or None."""
+    # Seek a second in to skip fade-ins; clips shorter than that get frame 0.
+    for seek in (POSTER_SEEK_SECONDS, 0):
+        try:
+            result = subprocess.run(
+                [FFMPEG, "-v", "error", "-ss", str(seek), "-i", path,
+                 "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "-"],
+                capture_output=True,
+                timeout=POSTER_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[WARNING] ffmpeg failed on {path}: {e}")
+            return None
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    return None
+
+
+def render(path, kind):
+    """
+    Encoded bytes of the `kind` rendition of the upload at `path`, or None
+    if there is nothing to render (animated GIFs keep their original, videos
+    without a decodable frame have no poster).
+    """
+    size = RENDITION_SIZES[kind]
+    if is_video(path):
+        frame = poster_frame(path)
+        if frame is None:
+            return None
+        image = Image.open(BytesIO(frame))
+    else:
+        image = Image.open(path)
+        if kind == "display" and getattr(image, "is_animated", False):
+            return None
+        # JPEGs decode straight to a nearby power-of-two scale, which is
+        # most of the win on 12 MP phone photos.
+        image.draft("RGB", size)
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.thumbnail(size, Image.LANCZOS)
+
+    out = BytesIO()
+    image.save(out, RENDITION_FORMAT, quality=RENDITION_QUALITY)
+    return out.getvalue()
@@ -0,0 +1,14 @@
+from flask import request
+
+
+def int_arg(name, default, minimum, maximum=None):
+    """
+    Integer query parameter `name`, or `default` if absent, capped at
+    `maximum`. Raises ValueError if it isn't a number >= `minimum`.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) < minimum:
+        raise ValueError(f"Invalid {name} value")
+    return min(int(value), maximum) if maximum else int(value)
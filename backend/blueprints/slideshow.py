@@ -1,72 +1,289 @@
+from eventlet import spawn_n, tpool
+from eventlet.semaphore import Semaphore
 from flask import Blueprint, request, jsonify, send_from_directory
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import safe_join
 import os
-import hashlib
-import json
+import threading
 from dotenv import load_dotenv
 
+from .hash_index import HashIndex
+from .media_catalog import SORT_KEYS, MediaCatalog, image_size, scan_folder
+from .upload_sessions import UploadSessions
+from .upload_spool import HashingSpool
+from .request_args import int_arg
+from .renditions import (
+    IMAGE_EXTENSIONS, RENDITION_EXTENSION, RENDITION_MIMETYPE, RENDITION_SIZES,
+    VIDEO_EXTENSIONS, can_render, render,
+)
+
 load_dotenv()
 
 slideshow = Blueprint("slideshow", __name__)
 
 UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER") or "uploads"
-HASH_FILE = os.path.join(UPLOAD_FOLDER, "hashes.json")
+HASH_FILE = os.path.join(UPLOAD_FOLDER, "hashes.json")  # before the SQLite index
+HASH_DB = os.path.join(UPLOAD_FOLDER, "hashes.sqlite3")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+hash_index = HashIndex(HASH_DB, legacy_path=HASH_FILE)
 
-def calculate_file_hash(file_stream):
-    """Calculate SHA-256 hash of a file stream."""
-    hash_obj = hashlib.sha256()
-    while chunk := file_stream.read(8192):
-        hash_obj.update(chunk)
-    file_stream.seek(0)  # Reset stream to beginning
-    return hash_obj.hexdigest()
+CHECK_HASHES_MAX = 10000
 
+MEDIA_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+MEDIA_PAGE_LIMIT = 500
+MEDIA_PAGE_MAX_LIMIT = 5000
+MEDIA_MEASURE_BATCH = 200
+# Seconds between checks for files added or removed outside the backend
+# (e.g. copied into the folder over SMB); 0 turns the watcher off.
+MEDIA_WATCH_INTERVAL = float(os.getenv("MEDIA_WATCH_INTERVAL") or 0)
 
-def load_hash_cache():
-    """Load or initialize hash cache."""
-    if os.path.exists(HASH_FILE):
-        with open(HASH_FILE, "r") as f:
-            return json.load(f)
-    return {}
+media_catalog = MediaCatalog(
+    UPLOAD_FOLDER, MEDIA_EXTENSIONS, VIDEO_EXTENSIONS, hash_index.by_filename()
+)
+catalog_wakeup = threading.Event()
 
 
-def save_hash_cache(cache):
-    """Save hash cache to file."""
-    with open(HASH_FILE, "w") as f:
-        json.dump(cache, f)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Uploads are written under this prefix until they are known not to be
+# duplicates; list_media doesn't match it.
+UPLOAD_TEMP_PREFIX = ".upload-"
 
+# Resumable uploads (init, PUT chunks at an offset, commit) for files too
+# big to send in one go. Sessions live in a folder list_media doesn't match
+# and are dropped after a day without activity.
+UPLOAD_SESSION_FOLDER = ".sessions"
+UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_MAX_CHUNK = 64 * 1024 * 1024
+UPLOAD_SESSION_MAX_AGE = 24 * 3600
+
+upload_sessions = UploadSessions(os.path.join(UPLOAD_FOLDER, UPLOAD_SESSION_FOLDER))
+
+
+def reload_upload_sessions():
+    """Move to the session folder in UPLOAD_FOLDER after a config change."""
+    global upload_sessions
+    directory = os.path.join(UPLOAD_FOLDER, UPLOAD_SESSION_FOLDER)
+    if upload_sessions.directory != directory:
+        upload_sessions = UploadSessions(directory)
 
-@slideshow.route("/upload", methods=["POST"])
-def upload_file():
-    if "file" not in request.files:
-        return "No file part", 400
 
-    files = request.files.getlist("file")
-    if not files:
-        return "No selected file(s)", 400
+def write_and_hash(f, hash_obj, data):
+    f.write(data)
+    hash_obj.update(data)
 
-    hash_cache = load_hash_cache()
-    uploaded_filenames = []
-    duplicate_filenames = []
 
-    for file in files:
-        if file.filename == "":
-            continue
+def flush_to_disk(f):
+    f.flush()
+    os.fsync(f.fileno())
 
-        file_hash = calculate_file_hash(file.stream)
 
-        if file_hash in hash_cache:
-            print(f"Duplicate file skipped: {file.filename}")
-            duplicate_filenames.append(file.filename)
-            continue
+def reload_hash_index():
+    """Switch to the index in UPLOAD_FOLDER, e.g. after the config changed it."""
+    global hash_index
+    if hash_index.path == HASH_DB:
+        return
+    hash_index.close()
+    hash_index = HashIndex(HASH_DB, legacy_path=HASH_FILE)
 
-        save_path = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(save_path)
-        uploaded_filenames.append(file.filename)
-        hash_cache[file_hash] = file.filename
 
-    save_hash_cache(hash_cache)
+# Display-sized copies and thumbnails live next to the uploads, in a folder
+# list_media doesn't match. They're made in the background after an upload
+# and again on request whenever one is missing or older than its source.
+RENDITION_FOLDER = ".renditions"
+RENDITION_WORKERS = 2
+# Bounds renders in flight; queued ones wait on it, never the request
+# that queued them.
+rendition_slots = Semaphore(RENDITION_WORKERS)
+_rendering = {}  # rendition path -> Event set when it has been written
+_rendering_lock = threading.Lock()
 
+
+def rendition_path(filename, kind):
+    return os.path.join(UPLOAD_FOLDER, RENDITION_FOLDER, f"{filename}.{kind}.{RENDITION_EXTENSION}")
+
+
+def _is_fresh(path, source):
+    try:
+        return os.path.getmtime(path) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def ensure_rendition(filename, kind):
+    """
+    Path of an up-to-date `kind` rendition of an upload, rendering it first
+    if needed, or None if there is none. Concurrent callers for the same
+    rendition wait for a single render.
+    """
+    source = safe_join(UPLOAD_FOLDER, filename)
+    if source is None or not os.path.isfile(source) or not can_render(filename, kind):
+        return None
+    path = rendition_path(filename, kind)
+
+    with _rendering_lock:
+        if _is_fresh(path, source):
+            return path
+        done = _rendering.get(path)
+        if done is None:
+            done = _rendering[path] = threading.Event()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        done.wait()
+        return path if _is_fresh(path, source) else None
+
+    try:
+        # Decoding and resizing are CPU-bound; keep them off the event loop.
+        data = tpool.execute(render, source, kind)
+        if data is None:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        print(f"[WARNING] Could not render {kind} for {filename}: {e}")
+        return None
+    finally:
+        with _rendering_lock:
+            _rendering.pop(path, None)
+        done.set()
+
+
+def _render_queued(filename, kind):
+    with rendition_slots:
+        ensure_rendition(filename, kind)
+
+
+def queue_renditions(filename):
+    """Render everything `filename` can have in the background."""
+    for kind in RENDITION_SIZES:
+        if can_render(filename, kind):
+            spawn_n(_render_queued, filename, kind)
+
+
+def remove_renditions(filenames):
+    folder = os.path.join(UPLOAD_FOLDER, RENDITION_FOLDER)
+    for filename in filenames:
+        for kind in RENDITION_SIZES:
+            path = safe_join(folder, f"{filename}.{kind}.{RENDITION_EXTENSION}")
+            try:
+                if path:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+# URLs pinned to the content (?v=<sha256>) never change; everything else
+# is revalidated against the content-hash ETag, which costs a 304.
+MEDIA_MAX_AGE = 365 * 24 * 3600
+
+
+def upload_hash(filename):
+    """The upload's SHA-256 from the index, or None if it isn't indexed."""
+    hashes = hash_index.hashes_for(filename)
+    return hashes[0] if len(hashes) == 1 else None
+
+
+def send_media(directory, filename, file_hash, kind=None, **kwargs):
+    """
+    send_from_directory with the upload's content hash (plus the rendition
+    kind) as a strong ETag; Werkzeug then answers If-None-Match with 304
+    and Range with 206. Unindexed files keep Werkzeug's mtime ETag.
+    """
+    etag = True
+    if file_hash is not None:
+        etag = file_hash if kind is None else f"{file_hash}-{kind}"
+    pinned = file_hash is not None and request.args.get("v") == file_hash
+    response = send_from_directory(
+        directory,
+        filename,
+        etag=etag,
+        max_age=MEDIA_MAX_AGE if pinned else None,
+        **kwargs,
+    )
+    if pinned:
+        response.cache_control.immutable = True
+    return response
+
+
+def measure_images(folder, names):
+    """{name: (width, height) or None} for images in `folder`."""
+    sizes = {}
+    for name in names:
+        try:
+            sizes[name] = image_size(os.path.join(folder, name))
+        except Exception as e:
+            print(f"[WARNING] Could not read the size of {name}: {e}")
+            sizes[name] = None
+    return sizes
+
+
+def catalog_task():
+    """
+    Read image dimensions for the catalog in the background and, if
+    MEDIA_WATCH_INTERVAL is set, rescan the folder when its mtime changes.
+    """
+    while True:
+        catalog = media_catalog
+        try:
+            if MEDIA_WATCH_INTERVAL and catalog.folder_changed():
+                scan = tpool.execute(scan_folder, catalog.folder, catalog.extensions)
+                catalog.rescan(hash_index.by_filename(), scan)
+            names = catalog.unmeasured_images()
+            for start in range(0, len(names), MEDIA_MEASURE_BATCH):
+                batch = names[start:start + MEDIA_MEASURE_BATCH]
+                catalog.set_dimensions(tpool.execute(measure_images, catalog.folder, batch))
+        except Exception as e:
+            print(f"[ERROR] Media catalog update failed: {e}")
+        catalog_wakeup.wait(MEDIA_WATCH_INTERVAL or None)
+        catalog_wakeup.clear()
+
+
+def setup_catalog():
+    """Start the background task that keeps the media catalog complete."""
+    spawn_n(catalog_task)
+
+
+def reload_catalog():
+    """Rebuild the catalog for UPLOAD_FOLDER, e.g. after the config changed it."""
+    global media_catalog
+    if media_catalog.folder == UPLOAD_FOLDER:
+        return
+    media_catalog = MediaCatalog(
+        UPLOAD_FOLDER, MEDIA_EXTENSIONS, VIDEO_EXTENSIONS, hash_index.by_filename()
+    )
+    catalog_wakeup.set()
+
+
+def store_upload(temp_path, file_hash, filename):
+    """
+    Move a fully received upload into place unless its content is already
+    there. Returns False (and removes `temp_path`) for a duplicate.
+    """
+    if not hash_index.claim(file_hash, filename):
+        print(f"Duplicate file skipped: {filename}")
+        os.remove(temp_path)
+        return False
+
+    save_path = os.path.join(UPLOAD_FOLDER, filename)
+    try:
+        os.replace(temp_path, save_path)
+    except Exception:
+        os.remove(temp_path)
+        hash_index.remove_hash(file_hash)
+        raise
+    media_catalog.add(filename, file_hash)
+    catalog_wakeup.set()
+    queue_renditions(filename)
+    return True
+
+
+def upload_result(uploaded_filenames, duplicate_filenames):
     if not uploaded_filenames:
         return jsonify({
             "message": "All files were duplicates and skipped.",
@@ -80,6 +297,175 @@ def upload_file():
         "duplicates": duplicate_filenames
     }), 200
 
+
+@slideshow.route("/upload", methods=["POST"])
+def upload_file():
+    # Parse the form here instead of through request.files, so each file is
+    # spooled straight into a hashed temp file in UPLOAD_FOLDER: the bytes
+    # are written once and hashed on the way, 64 KB at a time.
+    spool = HashingSpool(UPLOAD_FOLDER, UPLOAD_TEMP_PREFIX)
+    parser = request.make_form_data_parser()
+    parser.stream_factory = spool
+    try:
+        _, _, files = parser.parse_from_environ(request.environ)
+        if "file" not in files:
+            return "No file part", 400
+
+        files = files.getlist("file")
+        if not files:
+            return "No selected file(s)", 400
+
+        uploaded_filenames = []
+        duplicate_filenames = []
+
+        for file in files:
+            if file.filename == "":
+                continue
+
+            # Flush before the rename so the catalog sees the full size
+            file.stream.close()
+            if store_upload(file.stream.path, file.stream.hexdigest(), file.filename):
+                uploaded_filenames.append(file.filename)
+            else:
+                duplicate_filenames.append(file.filename)
+    finally:
+        spool.cleanup()
+
+    return upload_result(uploaded_filenames, duplicate_filenames)
+
+@slideshow.route("/upload-sessions", methods=["POST"])
+def create_upload_session():
+    """{"filename", "size"} -> {"upload_id", "offset", "chunk_size"}"""
+    data = request.get_json(silent=True) or {}
+    filename = data.get("filename")
+    size = data.get("size")
+
+    if (
+        not isinstance(filename, str)
+        or filename != os.path.basename(filename)
+        or filename.startswith(".")
+        or not filename.lower().endswith(MEDIA_EXTENSIONS)
+    ):
+        return jsonify({"error": "Invalid filename"}), 400
+    if not isinstance(size, int) or isinstance(size, bool) or size < 1:
+        return jsonify({"error": "Invalid size"}), 400
+
+    upload_sessions.expire(UPLOAD_SESSION_MAX_AGE)
+    session = upload_sessions.create(filename, size)
+    return jsonify({
+        "upload_id": session["id"],
+        "offset": 0,
+        "chunk_size": UPLOAD_SESSION_CHUNK_SIZE
+    }), 201
+
+
+@slideshow.route("/upload-sessions/<upload_id>", methods=["GET"])
+def get_upload_session(upload_id):
+    """Where to resume: the number of bytes the server has."""
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload session not found"}), 404
+    return jsonify({
+        "upload_id": upload_id,
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": session["offset"]
+    }), 200
+
+
+@slideshow.route("/upload-sessions/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    """
+    Append the raw request body at ?offset=, which must equal the session's
+    offset (409 with the right one otherwise). If the connection drops
+    mid-chunk, the bytes that did arrive are kept.
+    """
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload session not found"}), 404
+    try:
+        offset = int_arg("offset", None, 0)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if offset is None:
+        return jsonify({"error": "No offset provided"}), 400
+    if offset != session["offset"]:
+        return jsonify({"error": "Offset mismatch", "offset": session["offset"]}), 409
+
+    length = request.content_length
+    if length is None:
+        return jsonify({"error": "Content-Length required"}), 411
+    if length > UPLOAD_SESSION_MAX_CHUNK or offset + length > session["size"]:
+        return jsonify({"error": "Chunk too large"}), 413
+
+    if not upload_sessions.acquire(session):
+        return jsonify({"error": "Upload session busy", "offset": session["offset"]}), 409
+    received = 0
+    try:
+        if session["hash"] is None:
+            tpool.execute(upload_sessions.rehash, session)
+        with open(upload_sessions.part_path(upload_id), "r+b") as f:
+            f.seek(offset)
+            f.truncate()
+            try:
+                while received < length:
+                    # Read on the event loop, write and hash off it.
+                    data = request.stream.read(min(UPLOAD_CHUNK_SIZE, length - received))
+                    if not data:
+                        break
+                    tpool.execute(write_and_hash, f, session["hash"], data)
+                    received += len(data)
+            except ClientDisconnected:
+                pass
+            tpool.execute(flush_to_disk, f)
+        upload_sessions.advance(session, received)
+    except OSError as e:
+        # The running hash may include bytes that weren't recorded.
+        session["hash"] = None
+        print(f"[ERROR] Failed to write upload chunk for {session['filename']}: {e}")
+        return jsonify({"error": "Failed to write chunk", "offset": session["offset"]}), 500
+    finally:
+        upload_sessions.release(session)
+
+    return jsonify({"offset": session["offset"]}), 200
+
+
+@slideshow.route("/upload-sessions/<upload_id>/commit", methods=["POST"])
+def commit_upload_session(upload_id):
+    """Finish a complete upload; duplicates are dropped like in /upload."""
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload session not found"}), 404
+    if session["offset"] != session["size"]:
+        return jsonify({"error": "Upload incomplete", "offset": session["offset"]}), 409
+    if not upload_sessions.acquire(session):
+        return jsonify({"error": "Upload session busy", "offset": session["offset"]}), 409
+
+    try:
+        if session["hash"] is None:
+            tpool.execute(upload_sessions.rehash, session)
+        file_hash = session["hash"].hexdigest()
+        part_path = upload_sessions.detach(session)
+    finally:
+        upload_sessions.release(session)
+
+    filename = session["filename"]
+    if store_upload(part_path, file_hash, filename):
+        return upload_result([filename], [])
+    return upload_result([], [filename])
+
+
+@slideshow.route("/upload-sessions/<upload_id>", methods=["DELETE"])
+def cancel_upload_session(upload_id):
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload session not found"}), 404
+    if not upload_sessions.acquire(session):
+        return jsonify({"error": "Upload session busy"}), 409
+    upload_sessions.discard(session)
+    return jsonify({"message": "Upload cancelled"}), 200
+
+
 @slideshow.route("/check-hash", methods=["POST"])
 def check_hash():
     data = request.get_json()
@@ -88,25 +474,82 @@ def check_hash():
     if not file_hash:
         return jsonify({"error": "No hash provided"}), 400
 
-    hash_cache = load_hash_cache()
-
-    if file_hash in hash_cache:
+    if hash_index.contains(file_hash):
         return jsonify({"duplicate": True}), 200
     return jsonify({"duplicate": False}), 200
 
+@slideshow.route("/check-hashes", methods=["POST"])
+def check_hashes():
+    """{"hashes": [...]} -> {"duplicates": [...]}, the ones already uploaded."""
+    data = request.get_json(silent=True) or {}
+    hashes = data.get("hashes")
+
+    if not isinstance(hashes, list) or not all(isinstance(h, str) for h in hashes):
+        return jsonify({"error": "No hash list provided"}), 400
+    if len(hashes) > CHECK_HASHES_MAX:
+        return jsonify({"error": f"At most {CHECK_HASHES_MAX} hashes per request"}), 413
+
+    known = hash_index.known(set(hashes))
+    return jsonify({"duplicates": [h for h in hashes if h in known]}), 200
+
 @slideshow.route("/uploads/<filename>")
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    return send_media(UPLOAD_FOLDER, filename, upload_hash(filename))
+
+
+@slideshow.route("/renditions/<kind>/<filename>")
+def rendition(kind, filename):
+    if kind not in RENDITION_SIZES:
+        return jsonify({"error": "Unknown rendition"}), 404
+
+    path = ensure_rendition(filename, kind)
+    file_hash = upload_hash(filename)
+    if path is not None:
+        return send_media(
+            os.path.dirname(path),
+            os.path.basename(path),
+            file_hash,
+            kind=kind,
+            mimetype=RENDITION_MIMETYPE,
+        )
+
+    # Animated GIFs and videos are shown as uploaded.
+    if kind == "display":
+        return send_media(UPLOAD_FOLDER, filename, file_hash)
+    return jsonify({"error": "No rendition available"}), 404
 
 
 @slideshow.route("/media")
 def list_media():
-    valid_extensions = (".png", ".jpg", ".jpeg", ".gif", ".mp4", ".webm")
-    media_files = [
-        f for f in os.listdir(UPLOAD_FOLDER)
-        if f.lower().endswith(valid_extensions)
-    ]
-    return jsonify(media_files)
+    """
+    One page of the media catalog: ?sort=name|mtime|size&order=asc|desc,
+    ?offset=0&limit=500 (`next_offset` is null on the last page).
+    ?since=<version> answers {"version", "unchanged": true} if nothing
+    changed since that version.
+    """
+    since = request.args.get("since")
+    if since and since == media_catalog.version:
+        return jsonify({"version": since, "unchanged": True})
+
+    sort = request.args.get("sort", "name")
+    order = request.args.get("order", "asc")
+    if sort not in SORT_KEYS or order not in ("asc", "desc"):
+        return jsonify({"error": "Invalid sort or order"}), 400
+    try:
+        offset = int_arg("offset", 0, 0)
+        limit = int_arg("limit", MEDIA_PAGE_LIMIT, 1, MEDIA_PAGE_MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    version, total, items = media_catalog.page(sort, order == "desc", offset, limit)
+    end = offset + len(items)
+    return jsonify({
+        "version": version,
+        "total": total,
+        "offset": offset,
+        "next_offset": end if end < total else None,
+        "items": items,
+    })
 
 @slideshow.route("/delete/<filename>", methods=["DELETE"])
 def delete_file(filename):
@@ -114,17 +557,16 @@ def delete_file(filename):
     if not os.path.exists(file_path):
         return jsonify({"error": "File not found"}), 404
 
-    hash_cache = load_hash_cache()
-
     # Remove the file from disk
     try:
         os.remove(file_path)
     except Exception as e:
         return jsonify({"error": f"Failed to delete file: {str(e)}"}), 500
 
-    # Remove the file's hash from the hash cache
-    new_cache = {k: v for k, v in hash_cache.items() if v != filename}
-    save_hash_cache(new_cache)
+    # Remove the file's hash from the hash index
+    hash_index.remove_files([filename])
+    media_catalog.remove([filename])
+    remove_renditions([filename])
 
     return jsonify({"message": "File deleted"}), 200
 
@@ -136,12 +578,6 @@ def delete_multiple_files():
     if not isinstance(files_to_delete, list):
         return jsonify({"error": "Invalid data"}), 400
 
-    hash_cache = load_hash_cache()
-    updated_cache = {
-        k: v for k, v in hash_cache.items()
-        if v not in files_to_delete
-    }
-
     errors = []
     for filename in files_to_delete:
         file_path = os.path.join(UPLOAD_FOLDER, filename)
@@ -151,7 +587,9 @@ def delete_multiple_files():
         except Exception as e:
             errors.append(f"{filename}: {str(e)}")
 
-    save_hash_cache(updated_cache)
+    hash_index.remove_files(files_to_delete)
+    media_catalog.remove(files_to_delete)
+    remove_renditions(files_to_delete)
 
     if errors:
         return jsonify({"error": "Some files could not be deleted", "details": errors}), 500
@@ -1,8 +1,26 @@
-from flask import Blueprint, jsonify, request
+from eventlet import tpool
+from flask import Blueprint, jsonify, make_response, request
+from flask_socketio import emit
+from PIL import Image
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import json
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
+from .art_cache import ArtCache
+from .playlist_cache import PlaylistCache
+from .rate_limit import TokenBucket, retry_after_seconds
+from .request_args import int_arg
+
 load_dotenv()
 
 spotify = Blueprint("spotify", __name__)
@@ -15,39 +33,474 @@ TOKEN_URL = "https://accounts.spotify.com/api/token"
 SPOTIFY_API_BASE_URL = "https://api.spotify.com/v1/me/player"
 SPOTIFY_API_GENERIC = "https://api.spotify.com/v1"
 
+# (connect, read) timeouts in seconds for every Spotify call.
+SPOTIFY_TIMEOUT = (3.05, 10)
+
+# Spotify answers too many calls with 429 and a Retry-After. Each endpoint
+# gets its own token bucket (requests per second, burst) so one busy control
+# can't spend the whole budget, and nothing is sent while a Retry-After runs.
+SPOTIFY_RATE_LIMIT = (5, 10)
+SPOTIFY_ENDPOINT_RATE_LIMITS = {
+    "GET /v1/playlists/{id}/tracks": (20, 40),
+}
+# Shorter waits are slept out; longer ones fail fast with a local 429.
+SPOTIFY_MAX_RATE_LIMIT_WAIT = 1.0
+_SPOTIFY_ID = re.compile(r"/[0-9A-Za-z]{22}(?=/|$)")
+# Whatever follows these is an id, well-formed or not, so a client can't
+# mint a bucket per made-up id.
+_SPOTIFY_ID_AFTER = re.compile(r"/(playlists|users)/[^/]+")
+
+
+def endpoint_key(method, url):
+    """E.g. "GET /v1/playlists/{id}/tracks"; ids are folded so they share a bucket."""
+    path = _SPOTIFY_ID_AFTER.sub(r"/\1/{id}", urlsplit(url).path)
+    return f"{method.upper()} {_SPOTIFY_ID.sub('/{id}', path)}"
+
+
+def rate_limited_response(url, wait):
+    """A 429 for a request that was held back instead of sent."""
+    response = requests.Response()
+    response.status_code = 429
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+    response._content = json.dumps({"error": "Spotify rate limit, try again shortly"}).encode()
+    return response
+
+
+class SpotifySession(requests.Session):
+    """
+    requests.Session that applies SPOTIFY_TIMEOUT unless a call sets its own,
+    paces calls per endpoint and waits out (or fails fast on) Retry-After.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buckets = {}
+        self.blocked_until = 0.0
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate, burst = SPOTIFY_ENDPOINT_RATE_LIMITS.get(key, SPOTIFY_RATE_LIMIT)
+            bucket = self.buckets.setdefault(key, TokenBucket(rate, burst))
+        return bucket
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", SPOTIFY_TIMEOUT)
+        key = endpoint_key(method, url)
+
+        for attempt in range(2):
+            blocked = self.blocked_until - time.monotonic()
+            if blocked > SPOTIFY_MAX_RATE_LIMIT_WAIT:
+                return rate_limited_response(url, blocked)
+            slot = self._bucket(key).reserve(SPOTIFY_MAX_RATE_LIMIT_WAIT)
+            if slot is None:
+                return rate_limited_response(url, 1)
+            delay = max(blocked, slot)
+            if delay > 0:
+                time.sleep(delay)
+
+            response = super().request(method, url, **kwargs)
+            if response.status_code != 429:
+                return response
+
+            # A 429 means the call was not carried out, so one retry is safe.
+            retry_after = retry_after_seconds(response)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            print(f"[WARNING] Spotify rate limited {key}; retry after {retry_after:g}s")
+            if retry_after > SPOTIFY_MAX_RATE_LIMIT_WAIT:
+                break
+        return response
+
+
+def create_session(session_class=SpotifySession):
+    """
+    Shared keep-alive session for accounts.spotify.com and api.spotify.com.
+    Connection failures are retried twice; 5xx responses only for idempotent
+    methods (not the POSTs for next/previous, which would skip twice).
+    """
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=2,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+        # 429s are handled by SpotifySession, which doesn't block on long waits.
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    new_session = session_class()
+    new_session.mount("https://", adapter)
+    new_session.mount("http://", adapter)
+    return new_session
+
+
+session = create_session()
+# Cover art comes from the i.scdn.co CDN, which the Web API's rate limits
+# and Retry-After don't cover, so it skips SpotifySession's pacing.
+art_session = create_session(requests.Session)
+
+# Commands go to the last resolved device until it expires or Spotify
+# reports it gone, saving a /devices lookup per button press.
+DEVICE_CACHE_TTL = 300
+_device_cache = {"id": None, "expires_at": 0.0}
+
+# Refresh this many seconds before the token expires, so a request never
+# goes out with a token that expires in flight.
+TOKEN_REFRESH_MARGIN = 60
+
+# `generation` changes when the credentials do, so a refresh started with the
+# old ones doesn't overwrite the invalidation.
+_token_cache = {"access_token": None, "expires_at": 0.0, "generation": 0}
+_token_lock = threading.Lock()
 
-def get_access_token():
-    token_data = {
-        "grant_type": "refresh_token",
-        "refresh_token": REFRESH_TOKEN,
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-    }
-    response = requests.post(TOKEN_URL, data=token_data)
-    token_info = response.json()
 
-    if "access_token" in token_info:
+def invalidate_access_token():
+    """Forget the cached token, e.g. after the Spotify credentials changed."""
+    _token_cache["access_token"] = None
+    _token_cache["expires_at"] = 0.0
+    _token_cache["generation"] += 1
+
+
+def _token_valid():
+    return (
+        _token_cache["access_token"] is not None
+        and time.time() < _token_cache["expires_at"] - TOKEN_REFRESH_MARGIN
+    )
+
+
+def get_access_token():
+    """
+    Return a cached access token, refreshing it shortly before it expires.
+    Concurrent callers wait for a single refresh instead of each POSTing.
+    """
+    if _token_valid():
+        return _token_cache["access_token"]
+
+    with _token_lock:
+        # Another request may have refreshed it while we waited for the lock.
+        if _token_valid():
+            return _token_cache["access_token"]
+
+        generation = _token_cache["generation"]
+        token_data = {
+            "grant_type": "refresh_token",
+            "refresh_token": REFRESH_TOKEN,
+            "client_id": CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
+        }
+        try:
+            response = session.post(TOKEN_URL, data=token_data)
+            token_info = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print("Error getting access token:", e)
+            return None
+
+        if "access_token" not in token_info:
+            print("Error getting access token:", token_info)
+            return None
+
+        if generation == _token_cache["generation"]:
+            _token_cache["access_token"] = token_info["access_token"]
+            _token_cache["expires_at"] = time.time() + token_info.get("expires_in", 3600)
         return token_info["access_token"]
-    else:
-        print("Error getting access token:", token_info)
-        return None
 
 
-def get_active_device():
-    access_token = get_access_token()
+@spotify.errorhandler(requests.exceptions.RequestException)
+def spotify_unreachable(e):
+    print("[ERROR] Spotify request failed:", e)
+    return jsonify({"error": "Spotify request failed"}), 502
+
+
+def invalidate_active_device():
+    _device_cache["id"] = None
+    _device_cache["expires_at"] = 0.0
+
+
+def get_active_device(access_token=None):
+    """
+    Return the device to send commands to (the active one, else the first),
+    reusing the last answer for DEVICE_CACHE_TTL seconds.
+    """
+    if _device_cache["id"] and time.time() < _device_cache["expires_at"]:
+        return _device_cache["id"]
+
+    access_token = access_token or get_access_token()
     if not access_token:
         return None
 
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"{SPOTIFY_API_BASE_URL}/devices", headers=headers)
+    response = session.get(f"{SPOTIFY_API_BASE_URL}/devices", headers=headers)
 
     if response.status_code == 200:
         devices = response.json().get("devices", [])
         if devices:
-            return devices[0]["id"]
+            device = next((d for d in devices if d.get("is_active")), devices[0])
+            _device_cache["id"] = device["id"]
+            _device_cache["expires_at"] = time.time() + DEVICE_CACHE_TTL
+            return device["id"]
     return None
 
 
+def _device_gone(response):
+    """True if Spotify rejected a command because the device isn't available."""
+    if response.status_code == 404:
+        return True
+    try:
+        reason = response.json().get("error", {}).get("reason")
+    except (ValueError, AttributeError):
+        return False
+    return reason == "NO_ACTIVE_DEVICE"
+
+
+def send_to_device(access_token, send):
+    """
+    Call `send(device_id)` with the cached device. If Spotify says the device
+    is gone, resolve it again and retry once. Returns None if no device.
+    """
+    device_id = get_active_device(access_token)
+    if not device_id:
+        return None
+
+    response = send(device_id)
+    if _device_gone(response):
+        invalidate_active_device()
+        new_device_id = get_active_device(access_token)
+        if new_device_id:
+            response = send(new_device_id)
+    return response
+
+
+# Opened playlists are cached until their snapshot_id changes. On a miss the
+# pages are fetched in parallel once the metadata gives the track count.
+PLAYLIST_PAGE_SIZE = 100
+PLAYLIST_FETCH_WORKERS = 4
+PLAYLIST_CACHE_MAX_TRACKS = 10000
+PLAYLIST_TRACK_FIELDS = "items(track(uri,name,duration_ms,artists(name),album(images)))"
+# Tracks per /playlist/<id> response unless the client asks for another limit.
+PLAYLIST_RESPONSE_LIMIT = 100
+PLAYLIST_RESPONSE_MAX_LIMIT = 500
+# Optional JSON file that keeps the cache across restarts.
+PLAYLIST_CACHE_FILE = os.getenv("SPOTIFY_PLAYLIST_CACHE_FILE") or None
+
+playlist_cache = PlaylistCache(PLAYLIST_CACHE_MAX_TRACKS, PLAYLIST_CACHE_FILE)
+
+# The playlist list is served from memory and refreshed in the background once
+# it is older than PLAYLISTS_TTL (stale-while-revalidate).
+PLAYLISTS_TTL = 300
+# Covers are drawn at 56 px; the smallest image at least this wide is used.
+PLAYLIST_IMAGE_MIN_WIDTH = 56
+_playlists = {"items": None, "fetched_at": 0.0, "refreshing": False, "generation": 0}
+_playlists_lock = threading.Lock()
+
+# Album art is proxied through /spotify/art/<image id>?size=N: fetched from
+# Spotify's CDN once, shrunk to a size the layout draws and kept on disk.
+SPOTIFY_IMAGE_URL = "https://i.scdn.co/image"
+ART_SIZES = (56, 300)  # playlist rows, now-playing cover
+ART_JPEG_QUALITY = 85
+ART_CACHE_DIR = os.getenv("SPOTIFY_ART_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "art_cache"
+)
+ART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ART_MAX_AGE = 365 * 24 * 60 * 60
+_ART_ID = re.compile(r"^[0-9a-f]{16,64}$")
+
+art_cache = ArtCache(ART_CACHE_DIR, ART_CACHE_MAX_BYTES)
+
+# Playback state is polled once per backend and pushed to the clients in the
+# /spotify Socket.IO namespace, instead of every page polling Spotify itself.
+PLAYER_NAMESPACE = "/spotify"
+PLAYER_POLL_INTERVAL = 5  # while playing; sooner if the track ends first
+PLAYER_POLL_IDLE = 15  # paused or nothing playing
+PLAYER_POLL_FAST = 0.5  # for PLAYER_FAST_SECONDS after a command
+PLAYER_FAST_SECONDS = 3
+PLAYER_TRACK_END_GRACE = 0.5  # Spotify needs a moment to switch tracks
+PLAYER_BACKOFF_MAX = 60
+# A seek is pushed if progress is this far from where playback should be.
+PLAYER_SEEK_TOLERANCE_MS = 2000
+# Repeat/shuffle toggles use the polled state if it is this recent.
+PLAYER_STATE_MAX_AGE = 30
+
+# Bursts of volume changes are coalesced: only the newest value in a
+# VOLUME_DEBOUNCE window is sent, and a long drag sends every VOLUME_MAX_DELAY.
+VOLUME_DEBOUNCE = 0.15
+VOLUME_MAX_DELAY = 0.5
+_volume = {"value": None, "generation": 0, "sent_at": 0.0, "sent_value": None}
+_volume_lock = threading.Lock()
+
+socketio = None
+player_clients = set()
+player_wakeup = threading.Event()
+_player = {"now_playing": None, "player_state": None, "polled_at": 0.0, "fast_until": 0.0}
+
+
+def player_changed():
+    """Poll again right away (and quickly for a few seconds) after a command."""
+    _player["fast_until"] = time.monotonic() + PLAYER_FAST_SECONDS
+    player_wakeup.set()
+
+
+def trim_now_playing(data):
+    """The parts of /me/player the UI shows, in the /current-song shape."""
+    item = data.get("item") if data else None
+    if not item:
+        return None
+    context = data.get("context") or {}
+    return {
+        "item": {
+            "uri": item.get("uri"),
+            "name": item.get("name"),
+            "duration_ms": item.get("duration_ms") or 0,
+            "artists": [{"name": a.get("name")} for a in item.get("artists") or []],
+            "album": {"images": ((item.get("album") or {}).get("images") or [])[:1]},
+        },
+        "progress_ms": data.get("progress_ms") or 0,
+        "is_playing": bool(data.get("is_playing")),
+        "context": {"uri": context.get("uri")},
+    }
+
+
+def trim_player_state(data):
+    data = data or {}
+    device = data.get("device") or {}
+    return {
+        "shuffle_state": data.get("shuffle_state", False),
+        "repeat_state": data.get("repeat_state", "off"),
+        "volume_percent": device.get("volume_percent"),
+    }
+
+
+def fetch_player():
+    """
+    GET /me/player. Returns the raw state ({} if nothing is playing), or
+    None if Spotify couldn't be asked.
+    """
+    access_token = get_access_token()
+    if not access_token:
+        return None
+
+    headers = {"Authorization": f"Bearer {access_token}"}
+    try:
+        response = session.get(SPOTIFY_API_BASE_URL, headers=headers)
+    except requests.exceptions.RequestException as e:
+        print("[WARNING] Failed to poll Spotify player:", e)
+        return None
+
+    if response.status_code == 204:
+        return {}
+    if response.status_code == 401:
+        invalidate_access_token()
+    if response.status_code != 200:
+        print(f"[WARNING] Spotify player poll returned {response.status_code}")
+        return None
+    try:
+        return response.json() or {}
+    except ValueError:
+        return {}
+
+
+def _now_playing_changed(previous, current, elapsed):
+    """True if the track, play state or context changed, or playback jumped."""
+    if previous is None or current is None:
+        return previous is not current
+    if (
+        previous["item"]["uri"] != current["item"]["uri"]
+        or previous["is_playing"] != current["is_playing"]
+        or previous["context"] != current["context"]
+    ):
+        return True
+    expected = previous["progress_ms"] + (elapsed * 1000 if previous["is_playing"] else 0)
+    return abs(current["progress_ms"] - expected) > PLAYER_SEEK_TOLERANCE_MS
+
+
+def player_poll_delay(now_playing):
+    """Seconds until the next poll: soon after commands and at track ends."""
+    if time.monotonic() < _player["fast_until"]:
+        return PLAYER_POLL_FAST
+    if not now_playing or not now_playing["is_playing"]:
+        return PLAYER_POLL_IDLE
+    remaining = now_playing["item"]["duration_ms"] - now_playing["progress_ms"]
+    return max(PLAYER_POLL_FAST, min(PLAYER_POLL_INTERVAL, remaining / 1000 + PLAYER_TRACK_END_GRACE))
+
+
+def poll_player():
+    """
+    Poll Spotify once and push what changed: `now_playing` (the whole trimmed
+    track, or null) and `player_state` (only the changed keys). Returns
+    False if the poll failed.
+    """
+    data = fetch_player()
+    if data is None:
+        return False
+
+    now = time.monotonic()
+    elapsed = now - _player["polled_at"]
+    now_playing = trim_now_playing(data)
+    state = trim_player_state(data)
+    previous_state = _player["player_state"]
+
+    if _now_playing_changed(_player["now_playing"], now_playing, elapsed) or not _player["polled_at"]:
+        socketio.emit("now_playing", now_playing, namespace=PLAYER_NAMESPACE)
+    if previous_state is None:
+        changed = state
+    else:
+        changed = {k: v for k, v in state.items() if previous_state.get(k) != v}
+    if changed:
+        socketio.emit("player_state", changed, namespace=PLAYER_NAMESPACE)
+
+    _player["now_playing"] = now_playing
+    _player["player_state"] = state
+    _player["polled_at"] = now
+    return True
+
+
+def update_player_state(**changes):
+    """Record and push a change made from here, without waiting for a poll."""
+    if _player["player_state"] is not None:
+        _player["player_state"].update(changes)
+    if socketio:
+        socketio.emit("player_state", changes, namespace=PLAYER_NAMESPACE)
+
+
+def current_now_playing():
+    """The last polled track, with progress moved on to now."""
+    now_playing = _player["now_playing"]
+    if now_playing and now_playing["is_playing"]:
+        elapsed_ms = (time.monotonic() - _player["polled_at"]) * 1000
+        progress = min(now_playing["item"]["duration_ms"], now_playing["progress_ms"] + elapsed_ms)
+        now_playing = {**now_playing, "progress_ms": int(progress)}
+    return now_playing
+
+
+def player_task():
+    """One /me/player stream for all clients; idle while nobody listens."""
+    failures = 0
+    while True:
+        if not player_clients:
+            player_wakeup.wait()
+            player_wakeup.clear()
+            continue
+
+        try:
+            if poll_player():
+                failures = 0
+                delay = player_poll_delay(_player["now_playing"])
+            else:
+                failures += 1
+                delay = min(PLAYER_BACKOFF_MAX, PLAYER_POLL_INTERVAL * 2 ** (failures - 1))
+        except Exception as e:
+            print("[ERROR] Unexpected exception in player_task:", str(e))
+            failures += 1
+            delay = min(PLAYER_BACKOFF_MAX, PLAYER_POLL_INTERVAL * 2 ** (failures - 1))
+
+        # A command or a new client cuts the wait short.
+        player_wakeup.wait(delay)
+        player_wakeup.clear()
+
+
 def send_spotify_command(command):
     access_token = get_access_token()
     if not access_token:
@@ -58,23 +511,24 @@ def send_spotify_command(command):
         "Content-Type": "application/json",
     }
 
-    device_id = get_active_device()
-    if not device_id:
-        return jsonify({"error": "No active Spotify device found"}), 404
-
-    if command in ["play", "pause"]:
-        response = requests.put(
-            f"{SPOTIFY_API_BASE_URL}/{command}?device_id={device_id}",
-            headers=headers,
-            json={},
-        )
-    else:
+    def send(device_id):
+        if command in ["play", "pause"]:
+            return session.put(
+                f"{SPOTIFY_API_BASE_URL}/{command}?device_id={device_id}",
+                headers=headers,
+                json={},
+            )
         endpoint = "previous" if command == "prev" else "next"
-        response = requests.post(
+        return session.post(
             f"{SPOTIFY_API_BASE_URL}/{endpoint}?device_id={device_id}", headers=headers
         )
 
+    response = send_to_device(access_token, send)
+    if response is None:
+        return jsonify({"error": "No active Spotify device found"}), 404
+
     if response.status_code in [200, 202, 204]:
+        player_changed()
         return jsonify({"success": True})
 
     try:
@@ -116,7 +570,7 @@ def current_song():
         return jsonify({"error": "Failed to get access token"}), 401
 
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(
+    response = session.get(
         f"{SPOTIFY_API_BASE_URL}/currently-playing", headers=headers
     )
 
@@ -138,7 +592,7 @@ def get_player_state():
         return jsonify({"error": "Failed to get access token"}), 401
 
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
+    response = session.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
 
     if response.status_code == 200:
         data = response.json()
@@ -152,43 +606,106 @@ def get_player_state():
     return jsonify({"error": "Failed to get player state"}), response.status_code
 
 
+def trim_track(item):
+    """What the playlist view shows of a playlist item, or None if it has no track."""
+    track = item.get("track") if item else None
+    if not track or not track.get("uri"):
+        return None
+    images = (track.get("album") or {}).get("images") or []
+    return {
+        "uri": track["uri"],
+        "name": track.get("name"),
+        "artists": [a.get("name") for a in track.get("artists") or []],
+        "duration_ms": track.get("duration_ms", 0),
+        # Spotify lists album images largest first.
+        "image": images[-1]["url"] if images else None,
+    }
+
+
+def fetch_playlist_page(playlist_id, offset, headers):
+    """One page of trimmed playlist tracks, or the failed response."""
+    response = session.get(
+        f"{SPOTIFY_API_GENERIC}/playlists/{playlist_id}/tracks",
+        headers=headers,
+        params={
+            "limit": PLAYLIST_PAGE_SIZE,
+            "offset": offset,
+            "fields": PLAYLIST_TRACK_FIELDS,
+        },
+    )
+    if response.status_code != 200:
+        return response
+    return [t for t in map(trim_track, response.json().get("items", [])) if t]
+
+
 @spotify.route("/playlist/<playlist_id>", methods=["GET"])
 def get_playlist(playlist_id):
+    """
+    ?offset=0&limit=100 selects a slice of the tracks; `next_offset` is null
+    on the last one. ?until=<track uri> extends the slice to that track, so
+    the playing song can be shown without paging through to it.
+    """
+    try:
+        offset = int_arg("offset", 0, 0)
+        limit = int_arg("limit", PLAYLIST_RESPONSE_LIMIT, 1, PLAYLIST_RESPONSE_MAX_LIMIT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     access_token = get_access_token()
     if not access_token:
         return jsonify({"error": "Failed to get access token"}), 401
 
     headers = {"Authorization": f"Bearer {access_token}"}
-    all_tracks = []
-    offset = 0
-    limit = 100
-
-    while True:
-        url = f"{SPOTIFY_API_GENERIC}/playlists/{playlist_id}/tracks?limit={limit}&offset={offset}"
-        response = requests.get(url, headers=headers)
-
-        if response.status_code != 200:
-            return jsonify(
-                {"error": "Failed to fetch playlist info"}
-            ), response.status_code
-
-        data = response.json()
-        tracks = data.get("items", [])
-        all_tracks.extend(tracks)
-
-        if len(tracks) < limit:  # No more tracks left to fetch
-            break
 
-        offset += limit  # Move to next batch
+    # The snapshot id tells whether the cached tracks are still current.
+    response = session.get(
+        f"{SPOTIFY_API_GENERIC}/playlists/{playlist_id}",
+        headers=headers,
+        params={"fields": "name,snapshot_id,tracks.total"},
+    )
+    if response.status_code != 200:
+        return jsonify({"error": "Failed to fetch playlist info"}), response.status_code
+
+    playlist_info = response.json()
+    snapshot_id = playlist_info.get("snapshot_id")
+    entry = playlist_cache.get(playlist_id, snapshot_id)
+
+    if entry is None:
+        total = (playlist_info.get("tracks") or {}).get("total", 0)
+        offsets = range(0, total, PLAYLIST_PAGE_SIZE)
+        with ThreadPoolExecutor(max_workers=PLAYLIST_FETCH_WORKERS) as pool:
+            pages = list(
+                pool.map(lambda offset: fetch_playlist_page(playlist_id, offset, headers), offsets)
+            )
+
+        all_tracks = []
+        for page in pages:
+            if not isinstance(page, list):
+                return jsonify({"error": "Failed to fetch playlist info"}), page.status_code
+            all_tracks.extend(page)
+
+        entry = playlist_cache.put(
+            playlist_id,
+            snapshot_id,
+            playlist_info.get("name", "Unknown Playlist"),
+            all_tracks,
+        )
 
-    playlist_info_url = f"{SPOTIFY_API_GENERIC}/playlists/{playlist_id}"
-    response = requests.get(playlist_info_url, headers=headers)
-    playlist_info = response.json() if response.status_code == 200 else {}
+    tracks = entry["items"]
+    until = request.args.get("until")
+    if until:
+        index = next((i for i, t in enumerate(tracks) if t["uri"] == until), -1)
+        limit = max(limit, index - offset + 1)
 
+    end = min(offset + limit, len(tracks))
     return jsonify(
         {
-            "name": playlist_info.get("name", "Unknown Playlist"),
-            "tracks": {"items": all_tracks},
+            "name": entry["name"],
+            "snapshot_id": entry["snapshot_id"],
+            "total": len(tracks),
+            "offset": offset,
+            "next_offset": end if end < len(tracks) else None,
+            "tracks": tracks[offset:end],
         }
     )
 
@@ -199,10 +716,6 @@ def play_track():
     if not access_token:
         return jsonify({"error": "Failed to get access token"}), 401
 
-    device_id = get_active_device()
-    if not device_id:
-        return jsonify({"error": "No active Spotify device found"}), 404
-
     req_data = request.get_json()
     track_uri = req_data.get("uri")
     playlist_id = req_data.get("playlistId")
@@ -221,13 +734,19 @@ def play_track():
         "position_ms": 0,
     }
 
-    r = requests.put(
-        f"{SPOTIFY_API_BASE_URL}/play?device_id={device_id}",
-        headers=headers,
-        json=payload,
+    r = send_to_device(
+        access_token,
+        lambda device_id: session.put(
+            f"{SPOTIFY_API_BASE_URL}/play?device_id={device_id}",
+            headers=headers,
+            json=payload,
+        ),
     )
+    if r is None:
+        return jsonify({"error": "No active Spotify device found"}), 404
 
     if r.status_code in [200, 202, 204]:
+        player_changed()
         return jsonify({"success": True})
 
     return jsonify(
@@ -235,6 +754,21 @@ def play_track():
     ), r.status_code
 
 
+def current_player_state(headers):
+    """
+    Shuffle/repeat/volume from the poller if it is fresh, else from Spotify.
+    Returns (state, None) or (None, failed response).
+    """
+    state = _player["player_state"]
+    if state is not None and time.monotonic() - _player["polled_at"] <= PLAYER_STATE_MAX_AGE:
+        return state, None
+
+    response = session.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
+    if response.status_code != 200:
+        return None, response
+    return trim_player_state(response.json()), None
+
+
 @spotify.route("/repeat", methods=["POST"])
 def set_repeat():
     access_token = get_access_token()
@@ -243,19 +777,20 @@ def set_repeat():
 
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    response = requests.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
-    if response.status_code != 200:
-        return jsonify({"error": "Failed to get repeat state"}), response.status_code
+    state, failed = current_player_state(headers)
+    if failed is not None:
+        return jsonify({"error": "Failed to get repeat state"}), failed.status_code
 
-    repeat_state = response.json().get("repeat_state", "off")
+    repeat_state = state["repeat_state"]
 
     new_repeat_mode = "track" if repeat_state == "off" else "off"
 
-    response = requests.put(
+    response = session.put(
         f"{SPOTIFY_API_BASE_URL}/repeat?state={new_repeat_mode}", headers=headers
     )
 
     if response.status_code in [200, 204]:
+        update_player_state(repeat_state=new_repeat_mode)
         return jsonify({"success": True, "mode": new_repeat_mode})
 
     return jsonify({"error": "Failed to set repeat"}), response.status_code
@@ -269,16 +804,15 @@ def set_shuffle():
 
     headers = {"Authorization": f"Bearer {access_token}"}
 
-    response = requests.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
-    if response.status_code != 200:
-        return jsonify({"error": "Failed to get shuffle state"}), response.status_code
+    state, failed = current_player_state(headers)
+    if failed is not None:
+        return jsonify({"error": "Failed to get shuffle state"}), failed.status_code
 
-    player_state = response.json()
-    shuffle_state = player_state.get("shuffle_state", False)
+    shuffle_state = state["shuffle_state"]
 
     if shuffle_state == "smart":
         print("Smart Shuffle is enabled. Disabling it first...")
-        disable_response = requests.put(
+        disable_response = session.put(
             f"{SPOTIFY_API_BASE_URL}/shuffle?state=false", headers=headers
         )
         if disable_response.status_code not in [200, 204]:
@@ -288,12 +822,13 @@ def set_shuffle():
         shuffle_state = False
 
     new_shuffle_state = not shuffle_state
-    response = requests.put(
+    response = session.put(
         f"{SPOTIFY_API_BASE_URL}/shuffle?state={str(new_shuffle_state).lower()}",
         headers=headers,
     )
 
     if response.status_code in [200, 204]:
+        update_player_state(shuffle_state=new_shuffle_state)
         return jsonify({"success": True, "shuffle_state": new_shuffle_state})
 
     return jsonify({"error": "Failed to toggle shuffle"}), response.status_code
@@ -309,14 +844,32 @@ def set_volume():
     if volume is None or not volume.isdigit():
         return jsonify({"error": "Invalid volume value"}), 400
 
+    # Wait out the debounce window; if a newer value arrived meanwhile, that
+    # request sends it, unless nothing has been sent for VOLUME_MAX_DELAY.
+    with _volume_lock:
+        _volume["value"] = int(volume)
+        _volume["generation"] += 1
+        generation = _volume["generation"]
+    time.sleep(VOLUME_DEBOUNCE)
+    with _volume_lock:
+        now = time.monotonic()
+        recently_sent = now - _volume["sent_at"] < VOLUME_MAX_DELAY
+        if recently_sent and (
+            _volume["generation"] != generation or _volume["sent_value"] == _volume["value"]
+        ):
+            return jsonify({"success": True, "coalesced": True})
+        _volume["sent_at"] = now
+        value = _volume["sent_value"] = _volume["value"]
+
     headers = {"Authorization": f"Bearer {access_token}"}
-    params = {"volume_percent": int(volume)}
+    params = {"volume_percent": value}
 
-    response = requests.put(
+    response = session.put(
         f"{SPOTIFY_API_BASE_URL}/volume", headers=headers, params=params
     )
 
     if response.status_code in [200, 204]:
+        update_player_state(volume_percent=value)
         return jsonify({"success": True})
 
     return jsonify({"error": "Failed to change volume"}), response.status_code
@@ -329,7 +882,7 @@ def get_volume():
         return jsonify({"error": "Failed to get access token"}), 401
 
     headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
+    response = session.get(f"{SPOTIFY_API_BASE_URL}", headers=headers)
 
     if response.status_code == 200:
         data = response.json()
@@ -341,25 +894,175 @@ def get_volume():
         return jsonify({"error": "Failed to retrieve volume"}), response.status_code
 
 
-@spotify.route("/playlists", methods=["GET"])
-def get_playlists():
-    access_token = get_access_token()
-    if not access_token:
-        return jsonify({"error": "Failed to get access token"}), 401
+def invalidate_playlists():
+    """Forget the cached playlist list, e.g. after the Spotify account changed."""
+    _playlists["items"] = None
+    _playlists["fetched_at"] = 0.0
+    _playlists["generation"] += 1
+
+
+def pick_image(images, min_width):
+    """URL of the smallest image at least `min_width` wide, else the smallest one."""
+    wide_enough = [i for i in images if (i.get("width") or 0) >= min_width]
+    if wide_enough:
+        return min(wide_enough, key=lambda i: i["width"])["url"]
+    # Spotify lists images largest first and leaves out sizes for some covers.
+    return images[-1]["url"] if images else None
+
 
+def trim_playlist(playlist):
+    return {
+        "id": playlist["id"],
+        "name": playlist.get("name"),
+        "snapshot_id": playlist.get("snapshot_id"),
+        "image": pick_image(playlist.get("images") or [], PLAYLIST_IMAGE_MIN_WIDTH),
+    }
+
+
+def fetch_playlists(access_token):
+    """All of the user's playlists, trimmed, or the failed response."""
+    headers = {"Authorization": f"Bearer {access_token}"}
     playlists = []
     next_url = f"{SPOTIFY_API_GENERIC}/me/playlists?limit=50"
 
     while next_url:
-        headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get(next_url, headers=headers)
-
+        response = session.get(next_url, headers=headers)
         if response.status_code != 200:
-            return jsonify({"error": "Failed to fetch playlists"}), response.status_code
+            return response
 
         data = response.json()
-        playlists.extend(data["items"])
-
+        playlists.extend(trim_playlist(p) for p in data["items"] if p)
         next_url = data.get("next")
 
-    return jsonify({"items": playlists})
+    return playlists
+
+
+def store_playlists(playlists, generation):
+    """Cache a fetched list and drop the track cache of playlists that changed."""
+    if generation != _playlists["generation"]:
+        return
+    previous = {p["id"]: p["snapshot_id"] for p in _playlists["items"] or []}
+    for playlist in playlists:
+        if previous.get(playlist["id"], playlist["snapshot_id"]) != playlist["snapshot_id"]:
+            playlist_cache.invalidate(playlist["id"])
+    _playlists["items"] = playlists
+    _playlists["fetched_at"] = time.monotonic()
+
+
+def refresh_playlists():
+    """Background refresh of the playlist list."""
+    generation = _playlists["generation"]
+    try:
+        access_token = get_access_token()
+        result = fetch_playlists(access_token) if access_token else None
+        if isinstance(result, list):
+            store_playlists(result, generation)
+        else:
+            status = result.status_code if result is not None else "no access token"
+            print(f"[WARNING] Failed to refresh Spotify playlists ({status})")
+    except requests.exceptions.RequestException as e:
+        print("[WARNING] Failed to refresh Spotify playlists:", e)
+    finally:
+        _playlists["refreshing"] = False
+
+
+def revalidate_playlists():
+    """Start refresh_playlists in the background unless one is running."""
+    with _playlists_lock:
+        if _playlists["refreshing"]:
+            return
+        _playlists["refreshing"] = True
+    threading.Thread(target=refresh_playlists, daemon=True).start()
+
+
+@spotify.route("/playlists", methods=["GET"])
+def get_playlists():
+    playlists = _playlists["items"]
+    if playlists is not None:
+        # Serve the cached list and revalidate it behind the response if stale.
+        if time.monotonic() - _playlists["fetched_at"] > PLAYLISTS_TTL:
+            revalidate_playlists()
+        return jsonify({"items": playlists})
+
+    access_token = get_access_token()
+    if not access_token:
+        return jsonify({"error": "Failed to get access token"}), 401
+
+    generation = _playlists["generation"]
+    result = fetch_playlists(access_token)
+    if not isinstance(result, list):
+        return jsonify({"error": "Failed to fetch playlists"}), result.status_code
+
+    store_playlists(result, generation)
+    return jsonify({"items": result})
+
+
+def resize_art(data, size):
+    """JPEG of `data` scaled to fit `size` x `size`."""
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = BytesIO()
+        image.save(out, "JPEG", quality=ART_JPEG_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+@spotify.route("/art/<image_id>", methods=["GET"])
+def album_art(image_id):
+    """?size= is one of ART_SIZES (default: the playlist row size)."""
+    size = request.args.get("size", str(ART_SIZES[0]))
+    if not _ART_ID.match(image_id):
+        return jsonify({"error": "Invalid image id"}), 400
+    if not size.isdigit() or int(size) not in ART_SIZES:
+        return jsonify({"error": f"Size must be one of {list(ART_SIZES)}"}), 400
+
+    # Spotify image ids are content hashes, so id and size pin down the bytes.
+    key = f"{image_id}-{size}"
+    if request.if_none_match.contains(key):
+        response = make_response("", 304)
+    else:
+        data = tpool.execute(art_cache.get, f"{key}.jpg")
+        if data is None:
+            upstream = art_session.get(f"{SPOTIFY_IMAGE_URL}/{image_id}", timeout=SPOTIFY_TIMEOUT)
+            if upstream.status_code != 200:
+                return jsonify({"error": "Failed to fetch album art"}), upstream.status_code
+            try:
+                data = tpool.execute(resize_art, upstream.content, int(size))
+            except (OSError, Image.DecompressionBombError) as e:
+                print(f"[ERROR] Failed to resize album art {image_id}:", e)
+                return jsonify({"error": "Failed to resize album art"}), 502
+            try:
+                tpool.execute(art_cache.put, f"{key}.jpg", data)
+            except OSError as e:
+                print(f"[WARNING] Failed to cache album art {image_id}:", e)
+        response = make_response(data)
+        response.mimetype = "image/jpeg"
+
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = ART_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+def setup_socketio(sio):
+    """Push playback state to clients connected to the /spotify namespace."""
+    global socketio
+    socketio = sio
+
+    @socketio.on("connect", namespace=PLAYER_NAMESPACE)
+    def handle_player_connect():
+        player_clients.add(request.sid)
+        if _playlists["items"] is None:
+            revalidate_playlists()  # warm the list for the next page load
+        if _player["polled_at"]:
+            # Snapshot for the new client; the poll below sends any change.
+            emit("now_playing", current_now_playing())
+            emit("player_state", _player["player_state"])
+        player_wakeup.set()
+
+    @socketio.on("disconnect", namespace=PLAYER_NAMESPACE)
+    def handle_player_disconnect():
+        player_clients.discard(request.sid)
+
+    socketio.start_background_task(player_task)
@@ -0,0 +1,84 @@
+# Metric groups clients can subscribe to -> stats keys they cover.
+METRIC_GROUPS = {
+    "cpu": ("cpu_usage", "cpu_temp", "cpu_power"),
+    "gpu": ("gpu_usage", "gpu_temp", "gpu_power"),
+    "ram": ("ram_usage_gb",),
+    "disks": ("disks",),
+    "network": ("network",),
+}
+
+
+WIRE_FORMATS = ("json", "packed")
+
+
+class Subscription:
+    """
+    Clients of one host that asked for the same groups at the same rates and
+    wire format. They share a Socket.IO room, so each update is built and
+    serialized once per room, and the room keeps the state its clients were
+    last brought to. `schema` is set by the caller for the packed format.
+    """
+
+    def __init__(self, host, groups, wire_format="json"):
+        self.groups = groups  # group -> send every N host ticks
+        self.wire_format = wire_format
+        self.room = f"{host.room}|" + ",".join(
+            f"{group}@{every}" for group, every in sorted(groups.items())
+        )
+        if wire_format != "json":
+            self.room += f"|{wire_format}"
+        self.schema = None
+        self.sids = set()
+        self.sent = {}
+        self.emits = 0
+
+    def due_groups(self, tick):
+        if not self.emits:
+            # First update: every group, so new clients don't wait for slow ones.
+            return list(self.groups)
+        return [group for group, every in self.groups.items() if tick % every == 0]
+
+    def rates(self, interval):
+        """Effective rate in Hz per group."""
+        return {group: round(1 / (every * interval), 3) for group, every in self.groups.items()}
+
+
+def parse_groups(requested, interval, min_every=None):
+    """
+    Turn a subscription request into {group: every N ticks}. `requested` is a
+    list of group names (sent as often as allowed) or {group: rate in Hz};
+    rates are rounded to a whole number of the host's `interval` and capped
+    at one update per tick, or per `min_every[group]` ticks for groups with a
+    slower cadence. Raises ValueError for unknown groups or bad rates.
+    """
+    min_every = min_every or {}
+    if isinstance(requested, (list, tuple)):
+        requested = {group: None for group in requested}
+    if not isinstance(requested, dict) or not requested:
+        raise ValueError("Subscribe to at least one of: " + ", ".join(METRIC_GROUPS))
+
+    groups = {}
+    for group, rate in requested.items():
+        if group not in METRIC_GROUPS:
+            raise ValueError(f"Unknown metric group '{group}'")
+        if rate is None:
+            groups[group] = min_every.get(group, 1)
+            continue
+        try:
+            rate = float(rate)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rate for '{group}'")
+        if rate <= 0:
+            raise ValueError(f"Invalid rate for '{group}'")
+        groups[group] = max(min_every.get(group, 1), round(1 / (rate * interval)))
+    return groups
+
+
+def select_groups(stats, groups):
+    """The part of `stats` that belongs to `groups`."""
+    return {
+        key: stats[key]
+        for group in groups
+        for key in METRIC_GROUPS[group]
+        if key in stats
+    }
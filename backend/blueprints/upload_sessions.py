@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import threading
+import time
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessions:
+    """
+    Resumable uploads in `directory`: `<id>.part` holds the bytes received
+    so far and `<id>.json` the filename, total size and committed offset.
+
+    The running SHA-256 of each upload is kept in memory, so the data is
+    hashed as it arrives; after a restart (or a failed write) it is rebuilt
+    from the part file by `rehash`.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sessions = {}
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def part_path(self, upload_id):
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def _save(self, session):
+        meta = {key: session[key] for key in ("filename", "size", "offset", "updated_at")}
+        meta_path = self._meta_path(session["id"])
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def create(self, filename, size):
+        upload_id = secrets.token_hex(16)
+        session = {
+            "id": upload_id,
+            "filename": filename,
+            "size": size,
+            "offset": 0,
+            "updated_at": time.time(),
+            "hash": hashlib.sha256(),
+            "busy": False,
+        }
+        open(self.part_path(upload_id), "wb").close()
+        self._save(session)
+        with self.lock:
+            self.sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        """The session, loaded from disk if it predates this process, or None."""
+        if not _UPLOAD_ID.match(upload_id):
+            return None
+        with self.lock:
+            session = self.sessions.get(upload_id)
+            if session is not None:
+                return session
+            try:
+                with open(self._meta_path(upload_id)) as f:
+                    meta = json.load(f)
+                part_size = os.path.getsize(self.part_path(upload_id))
+            except (OSError, ValueError):
+                return None
+            session = dict(meta, id=upload_id, hash=None, busy=False)
+            # Bytes past the committed offset may be torn; they're rewritten.
+            session["offset"] = min(session["offset"], part_size)
+            self.sessions[upload_id] = session
+            return session
+
+    def acquire(self, session):
+        """Claim the session for one request; False if another holds it."""
+        with self.lock:
+            if session["busy"]:
+                return False
+            session["busy"] = True
+            return True
+
+    def release(self, session):
+        with self.lock:
+            session["busy"] = False
+
+    def rehash(self, session):
+        """Rebuild the running hash from the first `offset` bytes on disk."""
+        hash_obj = hashlib.sha256()
+        remaining = session["offset"]
+        with open(self.part_path(session["id"]), "rb") as f:
+            while remaining and (chunk := f.read(min(1024 * 1024, remaining))):
+                hash_obj.update(chunk)
+                remaining -= len(chunk)
+        session["hash"] = hash_obj
+
+    def advance(self, session, received):
+        """Record `received` more bytes as durably written."""
+        session["offset"] += received
+        session["updated_at"] = time.time()
+        self._save(session)
+
+    def detach(self, session):
+        """Forget the session, leaving its part file for the caller."""
+        with self.lock:
+            self.sessions.pop(session["id"], None)
+        try:
+            os.remove(self._meta_path(session["id"]))
+        except OSError:
+            pass
+        return self.part_path(session["id"])
+
+    def discard(self, session):
+        try:
+            os.remove(self.detach(session))
+        except OSError:
+            pass
+
+    def expire(self, max_age):
+        """Remove sessions with no activity for `max_age` seconds."""
+        cutoff = time.time() - max_age
+        for entry in os.scandir(self.directory):
+            upload_id, ext = os.path.splitext(entry.name)
+            if ext != ".json" or not _UPLOAD_ID.match(upload_id):
+                continue
+            session = self.get(upload_id)
+            if session is not None and not session["busy"] and session["updated_at"] < cutoff:
+                self.discard(session)
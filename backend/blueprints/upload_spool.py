@@ -0,0 +1,60 @@
+import hashlib
+import os
+import tempfile
+
+# mkstemp makes files readable by the owner only; spooled uploads are renamed
+# into the media folder as they are, so give them the mode open() would.
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+class HashingFile:
+    """
+    Temp file in `folder` that keeps the SHA-256 of everything written to
+    it. Other file methods go to the underlying file.
+    """
+
+    def __init__(self, folder, prefix):
+        fd, self.path = tempfile.mkstemp(dir=folder, prefix=prefix, suffix=".part")
+        os.fchmod(fd, FILE_MODE)
+        self.file = os.fdopen(fd, "w+b")
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        return self.file.write(data)
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class HashingSpool:
+    """
+    Stream factory for Werkzeug's form parser that spools every uploaded
+    file into a HashingFile, so the parser's own write to disk is the only
+    copy made and the hash comes for free. A file that's been renamed into
+    place is left alone by `cleanup`.
+    """
+
+    def __init__(self, folder, prefix):
+        self.folder = folder
+        self.prefix = prefix
+        self.files = []
+
+    def __call__(self, total_content_length, content_type, filename, content_length=None):
+        spooled = HashingFile(self.folder, self.prefix)
+        self.files.append(spooled)
+        return spooled
+
+    def cleanup(self):
+        """Close the spooled files and remove the ones still under a temp name."""
+        for spooled in self.files:
+            spooled.close()
+            try:
+                os.remove(spooled.path)
+            except OSError:
+                pass
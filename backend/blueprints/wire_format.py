@@ -0,0 +1,48 @@
+import struct
+import zlib
+
+
+HEADER = struct.Struct("<H")  # schema id
+
+
+class PackedSchema:
+    """
+    Fixed field order for the "packed" stats format.
+
+    A packed update is the little-endian uint16 schema id, a bitmap with one
+    bit per schema field present in the update, then one float32 per present
+    field in schema order. The field list is sent once ("stats_schema") when
+    a client subscribes; the id (a CRC of the field names) lets the client
+    notice a stale schema and subscribe again.
+    """
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self.id = zlib.crc32("\n".join(self.fields).encode("utf-8")) & 0xFFFF
+        self.bitmap_bytes = (len(self.fields) + 7) // 8
+
+    def describe(self):
+        return {"id": self.id, "fields": self.fields}
+
+    def pack(self, samples):
+        """Pack {field: float} (fields outside the schema are ignored) into bytes."""
+        bitmap = bytearray(self.bitmap_bytes)
+        present = sorted(self.index[field] for field in samples if field in self.index)
+        values = []
+        for i in present:
+            bitmap[i >> 3] |= 1 << (i & 7)
+            values.append(samples[self.fields[i]])
+        return HEADER.pack(self.id) + bytes(bitmap) + struct.pack(f"<{len(values)}f", *values)
+
+    def unpack(self, data):
+        """Inverse of `pack`, for tests and benchmarks."""
+        (schema_id,) = HEADER.unpack_from(data)
+        if schema_id != self.id:
+            raise ValueError("Packed stats use a different schema")
+        bitmap = data[HEADER.size:HEADER.size + self.bitmap_bytes]
+        present = [
+            field for i, field in enumerate(self.fields) if bitmap[i >> 3] & (1 << (i & 7))
+        ]
+        offset = HEADER.size + self.bitmap_bytes
+        return dict(zip(present, struct.unpack_from(f"<{len(present)}f", data, offset)))
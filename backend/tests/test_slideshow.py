@@ -0,0 +1,71 @@
+import importlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing the blueprint opens the hash index in UPLOAD_FOLDER; keep that
+# out of the working tree.
+os.environ.setdefault("UPLOAD_FOLDER", tempfile.mkdtemp())
+
+# `blueprints.slideshow` is shadowed by the Blueprint of the same name.
+slideshow = importlib.import_module("blueprints.slideshow")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Switch folders the way the config blueprint does.
+    monkeypatch.setattr(slideshow, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(slideshow, "HASH_FILE", str(tmp_path / "hashes.json"))
+    monkeypatch.setattr(slideshow, "HASH_DB", str(tmp_path / "hashes.sqlite3"))
+    slideshow.reload_hash_index()
+    slideshow.reload_catalog()
+    slideshow.reload_upload_sessions()
+
+    app = Flask(__name__)
+    app.register_blueprint(slideshow.slideshow, url_prefix="/slideshow")
+    return app.test_client()
+
+
+def png_bytes():
+    out = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(out, "PNG")
+    out.seek(0)
+    return out
+
+
+def test_non_media_upload_is_not_listed(client):
+    response = client.post(
+        "/slideshow/upload",
+        data={"file": [(io.BytesIO(b"just text"), "notes.txt"), (png_bytes(), "photo.png")]},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+
+    media = client.get("/slideshow/media").get_json()
+    assert [item["name"] for item in media["items"]] == ["photo.png"]
+    assert media["items"][0]["type"] == "image"
+
+
+def test_upload_gets_default_file_mode(client):
+    client.post(
+        "/slideshow/upload",
+        data={"file": (png_bytes(), "photo.png")},
+        content_type="multipart/form-data",
+    )
+
+    umask = os.umask(0)
+    os.umask(umask)
+    mode = os.stat(os.path.join(slideshow.UPLOAD_FOLDER, "photo.png")).st_mode & 0o777
+    assert mode == 0o666 & ~umask
+
+
+def test_check_hashes_rejects_oversized_batch(client):
+    hashes = ["0" * 64] * (slideshow.CHECK_HASHES_MAX + 1)
+    response = client.post("/slideshow/check-hashes", json={"hashes": hashes})
+    assert response.status_code == 413
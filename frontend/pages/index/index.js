@@ -52,16 +52,63 @@ function shuffleArray(array) {
   return shuffled;
 }
 
-fetch(`http://${serverIP}/slideshow/media`)
-  .then((response) => response.json())
-  .then((data) => {
-    mediaFiles = shuffleArray(data);
-    if (mediaFiles.length > 0) {
-      startSlideshow();
+let mediaFiles = [];
+let mediaHashes = {};
+let mediaVersion = null;
+let slideshowStarted = false;
+const MEDIA_REFRESH_MS = 5 * 60 * 1000;
+
+// Page through the catalog; skipped entirely when its version is unchanged
+async function refreshMediaList() {
+  if (mediaVersion) {
+    const response = await fetch(`http://${serverIP}/slideshow/media?since=${encodeURIComponent(mediaVersion)}`);
+    const data = await response.json();
+    if (data.unchanged) return;
+  }
+
+  const items = [];
+  let offset = 0;
+  let version = null;
+  while (offset !== null) {
+    const response = await fetch(`http://${serverIP}/slideshow/media?offset=${offset}&limit=5000`);
+    const data = await response.json();
+    if (version && data.version !== version) {
+      // Changed while paging; start over
+      return refreshMediaList();
     }
-  })
-  .catch((err) => console.error(err));
+    version = data.version;
+    items.push(...data.items);
+    offset = data.next_offset;
+  }
+
+  mediaVersion = version;
+  mediaHashes = Object.fromEntries(items.map((item) => [item.name, item.hash]));
+  mediaFiles = shuffleArray(items.map((item) => item.name));
+
+  if (!slideshowStarted && mediaFiles.length > 0) {
+    slideshowStarted = true;
+    startSlideshow();
+  }
+}
+
+refreshMediaList().catch((err) => console.error(err));
+setInterval(() => refreshMediaList().catch((err) => console.error(err)), MEDIA_REFRESH_MS);
 
+// The hash pins a URL to the content, so the browser may cache it for good
+function withVersion(url, fileName) {
+  const hash = mediaHashes[fileName];
+  return hash ? `${url}?v=${hash}` : url;
+}
+
+
+// Screen-sized copies made by the backend; full-size photos stall the Pi.
+function renditionUrl(kind, fileName) {
+  return withVersion(`http://${serverIP}/slideshow/renditions/${kind}/${encodeURIComponent(fileName)}`, fileName);
+}
+
+function mediaUrl(fileName) {
+  return withVersion(`http://${serverIP}/slideshow/uploads/${encodeURIComponent(fileName)}`, fileName);
+}
 
 function waitForFirstVideoFrame(video, cb, timeoutMs = 8000) {
   let done = false;
@@ -142,7 +189,7 @@ function startSlideshow() {
 
   function preloadNext(fileName) {
     const lower = fileName.toLowerCase();
-    const url = `http://${serverIP}/slideshow/uploads/${encodeURIComponent(fileName)}`;
+    const url = mediaUrl(fileName);
 
     preloadEl = null;
 
@@ -156,7 +203,7 @@ function startSlideshow() {
       preloadEl = v;
     } else {
       const i = new Image();
-      i.src = url;
+      i.src = renditionUrl("display", fileName);
       preloadEl = i;
     }
   }
@@ -194,6 +241,13 @@ function startSlideshow() {
       imageTimer = null;
     }
 
+    // Everything was deleted since the last refresh; keep checking so the
+    // slideshow carries on once a refresh brings new files
+    if (mediaFiles.length === 0) {
+      imageTimer = setTimeout(() => transitionToNext("empty"), 7000);
+      return;
+    }
+
     // Advance index first
     index++;
     if (index >= mediaFiles.length) {
@@ -241,7 +295,7 @@ function startSlideshow() {
     container.innerHTML = "";
     const lower = fileName.toLowerCase();
     const isVideo = lower.endsWith(".mp4") || lower.endsWith(".webm");
-    const url = `http://${serverIP}/slideshow/uploads/${encodeURIComponent(fileName)}`;
+    const url = mediaUrl(fileName);
 
     if (isVideo) {
       const video = document.createElement("video");
@@ -256,6 +310,7 @@ function startSlideshow() {
       video.setAttribute("webkit-playsinline", "");
       video.setAttribute("muted", "");
 
+      video.poster = renditionUrl("poster", fileName);
       video.src = url;
       container.appendChild(video);
 
@@ -298,12 +353,19 @@ function startSlideshow() {
 
     } else {
       const img = document.createElement("img");
-      img.src = url;
+      img.src = renditionUrl("display", fileName);
       img.loading = "eager";
       img.decoding = "async";
       container.appendChild(img);
 
+      let triedOriginal = false;
       img.onerror = () => {
+        // Fall back to the original once if the rendition can't be served
+        if (!triedOriginal) {
+          triedOriginal = true;
+          img.src = url;
+          return;
+        }
         console.error(`Failed to load image: ${fileName}`);
         if (onFail) onFail();
       };
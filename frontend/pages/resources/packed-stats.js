@@ -0,0 +1,47 @@
+// Decoder for the backend's opt-in "packed" stats format: a little-endian
+// uint16 schema id, a bitmap of the schema fields present, then one float32
+// per present field. Decoded updates have the same shape as the JSON ones.
+
+function compilePackedSchema(schema) {
+    const fields = schema.fields.map((name) => {
+        if (name.startsWith("disk:")) return { group: "disks", key: name.slice(5) };
+        const net = /^net_(upload|download):(.*)$/.exec(name);
+        if (net) return { group: "network", key: net[2], field: net[1] };
+        return { group: null, key: name };
+    });
+    return { id: schema.id, fields, bitmapBytes: Math.ceil(fields.length / 8) };
+}
+
+// Returns null if `buffer` was packed with a different schema.
+function decodePackedStats(buffer, schema) {
+    const view = new DataView(buffer);
+    if (view.getUint16(0, true) !== schema.id) return null;
+
+    const { fields } = schema;
+    const changed = {};
+    let offset = 2 + schema.bitmapBytes;
+    for (let i = 0; i < fields.length; i++) {
+        if (!(view.getUint8(2 + (i >> 3)) & (1 << (i & 7)))) continue;
+
+        // float32 -> 2 decimals, so 67.4 doesn't render as 67.40000152587891
+        const value = Math.round(view.getFloat32(offset, true) * 100) / 100;
+        offset += 4;
+
+        const f = fields[i];
+        if (f.group === null) {
+            changed[f.key] = value;
+        } else if (f.group === "disks") {
+            if (!changed.disks) changed.disks = {};
+            changed.disks[f.key] = value;
+        } else {
+            if (!changed.network) changed.network = {};
+            if (!changed.network[f.key]) changed.network[f.key] = {};
+            changed.network[f.key][f.field] = value;
+        }
+    }
+    return changed;
+}
+
+if (typeof module !== "undefined") {
+    module.exports = { compilePackedSchema, decodePackedStats };
+}
@@ -1,5 +1,8 @@
 ﻿const serverIP = `${CONFIG.SERVER_PC_IP}`;
+// resources.html?host=<name> shows another PC from the backend's host registry.
+const monitoredHost = new URLSearchParams(window.location.search).get("host") || "";
 const socket = io(`http://${serverIP}`, {
+    query: monitoredHost ? { host: monitoredHost } : {},
     reconnection: true,
     reconnectionAttempts: 9999,
     reconnectionDelay: 1000,
@@ -10,10 +13,12 @@ const socket = io(`http://${serverIP}`, {
 const statusEl = document.getElementById("ohm-status");
 const startTime = Date.now();
 let lastUpdateAt = 0;
+let statusVisible = false;
 const STALE_AFTER_MS = 5000;
 
 function setStatus(text, level) {
     if (!statusEl) return;
+    statusVisible = !!text;
     statusEl.textContent = text || "";
     statusEl.classList.remove("status-hidden", "status-warn", "status-error");
 
@@ -31,12 +36,17 @@ function setStatus(text, level) {
 
 setStatus("Waiting for Open Hardware Monitor...", "warn");
 
+// Latest full stats; keyframes replace it, deltas patch it.
+let currentStats = {};
+let diskBars = {};
+
 // Disks
 function renderDisks(disks) {
     const container = document.getElementById("disk-stats");
     if (!container) return;
 
     container.innerHTML = "";
+    diskBars = {};
 
     if (!disks || Object.keys(disks).length === 0) {
         container.innerHTML = "<p>No disks configured</p>";
@@ -44,8 +54,6 @@ function renderDisks(disks) {
     }
 
     for (const [name, value] of Object.entries(disks)) {
-        const percent = Math.max(0, Math.min(100, Number(value) || 0));
-
         const label = document.createElement("p");
         label.textContent = name;
 
@@ -54,8 +62,8 @@ function renderDisks(disks) {
 
         const bar = document.createElement("div");
         bar.className = "progress-bar";
-        bar.style.width = `${percent}%`;
-        bar.textContent = `${percent.toFixed(1)}%`;
+        setDiskBar(bar, value);
+        diskBars[name] = bar;
 
         progress.appendChild(bar);
         container.appendChild(label);
@@ -63,32 +71,177 @@ function renderDisks(disks) {
     }
 }
 
-socket.on("update_stats", (data) => {
-    lastUpdateAt = Date.now();
-    setStatus("", "warn");
+function setDiskBar(bar, value) {
+    const percent = Math.max(0, Math.min(100, Number(value) || 0));
+    bar.style.width = `${percent}%`;
+    bar.textContent = `${percent.toFixed(1)}%`;
+}
+
+// Update bars in place; rebuild only when the set of disks changed.
+function updateDisks(changed) {
+    const names = Object.keys(currentStats.disks || {});
+    const sameDisks =
+        names.length > 0 &&
+        names.length === Object.keys(diskBars).length &&
+        names.every((name) => diskBars[name]);
+    if (!sameDisks) {
+        renderDisks(currentStats.disks);
+        return;
+    }
+
+    for (const [name, value] of Object.entries(changed)) {
+        setDiskBar(diskBars[name], value);
+    }
+}
+
+function setGauge(name, percent) {
+    document.getElementById(`${name}-gauge-text`).textContent = Math.round(percent);
+    document.getElementById(`${name}-gauge`).style.setProperty("--value", `${(percent / 100) * 360}deg`);
+}
 
+// Only touch the elements whose stats are present in `changed`.
+function renderStats(changed) {
     // CPU
-    document.getElementById("cpu_temp").innerText = `CPU Temp: ${data.cpu_temp || "N/A"}°`;
-    document.getElementById("cpu_power").innerText = `CPU Power: ${data.cpu_power || "N/A"}W`;
-    document.getElementById("cpu-gauge-text").textContent = Math.round(data.cpu_usage);
-    document.getElementById("cpu-gauge").style.setProperty("--value", `${(data.cpu_usage / 100) * 360}deg`);
+    if ("cpu_temp" in changed) {
+        document.getElementById("cpu_temp").innerText = `CPU Temp: ${changed.cpu_temp || "N/A"}°`;
+    }
+    if ("cpu_power" in changed) {
+        document.getElementById("cpu_power").innerText = `CPU Power: ${changed.cpu_power || "N/A"}W`;
+    }
+    if ("cpu_usage" in changed) setGauge("cpu", changed.cpu_usage);
 
     // GPU
-    document.getElementById("gpu_temp").innerText = `GPU Temp: ${data.gpu_temp || "N/A"}°`;
-    document.getElementById("gpu_power").innerText = `GPU Power: ${data.gpu_power || "N/A"}W`;
-    document.getElementById("gpu-gauge-text").textContent = Math.round(data.gpu_usage);
-    document.getElementById("gpu-gauge").style.setProperty("--value", `${(data.gpu_usage / 100) * 360}deg`);
+    if ("gpu_temp" in changed) {
+        document.getElementById("gpu_temp").innerText = `GPU Temp: ${changed.gpu_temp || "N/A"}°`;
+    }
+    if ("gpu_power" in changed) {
+        document.getElementById("gpu_power").innerText = `GPU Power: ${changed.gpu_power || "N/A"}W`;
+    }
+    if ("gpu_usage" in changed) setGauge("gpu", changed.gpu_usage);
 
     // RAM
-    const totalRamGB = 32;
-    const usedRamGB = parseFloat(data.ram_usage_gb) || 0;
-    const ramPercent = (usedRamGB / totalRamGB) * 100;
-    document.getElementById("ram-gauge").style.setProperty("--value", `${(ramPercent / 100) * 360}deg`);
-    document.getElementById("ram-gauge-text").textContent = Math.round(ramPercent);
+    if ("ram_usage_gb" in changed) {
+        const totalRamGB = 32;
+        const usedRamGB = parseFloat(changed.ram_usage_gb) || 0;
+        setGauge("ram", (usedRamGB / totalRamGB) * 100);
+    }
+
+    if ("disks" in changed) updateDisks(changed.disks);
+}
+
+function markAlive() {
+    lastUpdateAt = Date.now();
+    if (statusVisible) setStatus("", "warn");
+}
+
+// Groups this page shows, with rates in Hz (null = every backend tick).
+const SUBSCRIPTION = { cpu: null, gpu: null, ram: null, disks: 0.2 };
+// resources.html?wire=packed switches the stats channel to binary updates.
+const WIRE_FORMAT = new URLSearchParams(window.location.search).get("wire") === "packed" ? "packed" : "json";
+let packedSchema = null;
+
+function subscribe() {
+    socket.emit("subscribe", { groups: SUBSCRIPTION, format: WIRE_FORMAT }, (reply) => {
+        if (reply && reply.error) console.error("Subscribe failed:", reply.error);
+    });
+}
+
+socket.on("connect", subscribe);
+
+socket.on("stats_schema", (schema) => {
+    packedSchema = compilePackedSchema(schema);
+});
+
+// Full keyframe for the groups it contains: sent on subscribe and periodically.
+socket.on("update_stats", (data) => {
+    markAlive();
+    currentStats = { ...currentStats, ...data };
+    if (data.disks) currentStats.disks = { ...data.disks };
+    renderStats(data);
+});
 
-    renderDisks(data.disks);
+// Only the stats that changed since the last message (may be empty).
+function applyDelta(delta) {
+    markAlive();
+    const { disks, ...rest } = delta;
+    Object.assign(currentStats, rest);
+    if (disks) {
+        currentStats.disks = { ...(currentStats.disks || {}), ...disks };
+    }
+    renderStats(delta);
+}
+
+socket.on("update_stats_delta", applyDelta);
+
+// Packed binary update: decoded into the same shape as a delta.
+socket.on("update_stats_packed", (buffer) => {
+    const changed = packedSchema && decodePackedStats(buffer, packedSchema);
+    if (!changed) {
+        // Schema changed under us (or never arrived): ask for it again.
+        packedSchema = null;
+        subscribe();
+        return;
+    }
+    applyDelta(changed);
 });
 
+// Temperature sparklines from the backend's metric history (last 10 minutes).
+const HISTORY_URL = `http://${serverIP}/monitoring/history`;
+const SPARKLINES = { cpu_temp: "cpu-sparkline", gpu_temp: "gpu-sparkline" };
+const hostParam = monitoredHost ? `&host=${encodeURIComponent(monitoredHost)}` : "";
+
+function drawSparkline(canvas, points) {
+    const ctx = canvas.getContext("2d");
+    const { width, height } = canvas;
+    ctx.clearRect(0, 0, width, height);
+    if (!points || points.length < 2) return;
+
+    const min = Math.min(...points.map((p) => p[1]));
+    const max = Math.max(...points.map((p) => p[2]));
+    const range = max - min || 1;
+    const start = points[0][0];
+    const span = points[points.length - 1][0] - start || 1;
+    const x = (p) => ((p[0] - start) / span) * width;
+    const y = (v) => height - 2 - ((v - min) / range) * (height - 4);
+    const accent = getComputedStyle(document.documentElement).getPropertyValue("--accent").trim() || "#5ad1a2";
+
+    // min/max band
+    ctx.beginPath();
+    points.forEach((p, i) => (i ? ctx.lineTo(x(p), y(p[2])) : ctx.moveTo(x(p), y(p[2]))));
+    for (let i = points.length - 1; i >= 0; i--) ctx.lineTo(x(points[i]), y(points[i][1]));
+    ctx.closePath();
+    ctx.globalAlpha = 0.2;
+    ctx.fillStyle = accent;
+    ctx.fill();
+
+    // average
+    ctx.globalAlpha = 1;
+    ctx.beginPath();
+    points.forEach((p, i) => (i ? ctx.lineTo(x(p), y(p[3])) : ctx.moveTo(x(p), y(p[3]))));
+    ctx.strokeStyle = accent;
+    ctx.lineWidth = 2;
+    ctx.stroke();
+}
+
+async function refreshSparklines() {
+    for (const [metric, canvasId] of Object.entries(SPARKLINES)) {
+        const canvas = document.getElementById(canvasId);
+        if (!canvas) continue;
+
+        try {
+            const response = await fetch(`${HISTORY_URL}?metric=${metric}&since=-600&step=10${hostParam}`);
+            if (!response.ok) continue;
+            const data = await response.json();
+            drawSparkline(canvas, data.points);
+        } catch (error) {
+            console.warn(`Failed to load ${metric} history:`, error);
+        }
+    }
+}
+
+refreshSparklines();
+setInterval(refreshSparklines, 30000);
+
 socket.on("connect_error", (error) => {
     console.error("WebSocket connection error:", error);
     setStatus("Cannot connect to the monitor server.", "error");
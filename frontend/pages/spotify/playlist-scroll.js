@@ -1,4 +1,5 @@
 const blockClicksMS = 300;
+const loadMoreThresholdPx = 600;
 let playlistContainer = document.querySelector(".playlist-container");
 
 let isDragging = false;
@@ -68,6 +69,15 @@ playlistContainer.addEventListener("mouseleave", () => {
   startMomentumScroll();
 });
 
+// Fetch the next page of tracks before the end of the list comes into view.
+playlistContainer.addEventListener("scroll", () => {
+  const remaining =
+    playlistContainer.scrollHeight - playlistContainer.scrollTop - playlistContainer.clientHeight;
+  if (remaining < loadMoreThresholdPx) {
+    loadMorePlaylistTracks();
+  }
+}, { passive: true });
+
 function startMomentumScroll() {
   // If velocity is almost zero, stop
   if (Math.abs(velocity) < 0.5) return;
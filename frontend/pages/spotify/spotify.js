@@ -1,9 +1,20 @@
 const serverIP = `${CONFIG.SERVER_PC_IP}`;
 const API_BASE_URL = `http://${serverIP}/spotify`;
+// The backend polls Spotify once and pushes playback changes here; the HTTP
+// refreshes below only run while this socket is down.
+const playerSocket = io(`http://${serverIP}/spotify`, {
+  reconnection: true,
+  reconnectionDelay: 1000,
+  reconnectionDelayMax: 5000,
+});
 
 let currentPlayingUri = null;
 let currentPlaylistId = null;
 let currentlyLoadedPlaylist = null;
+const PLAYLIST_PAGE_LIMIT = 100;
+let playlistNextOffset = null; // null once the whole playlist is shown
+let playlistSnapshotId = null;
+let playlistPageLoading = false;
 let clickBlocked = false;
 
 let lastProgress = 0;
@@ -15,17 +26,34 @@ let songInfoRequestId = 0;
 let playPausePending = null; // { desired: boolean, startedAt: number, stableSince: number | null }
 let playPauseSyncTimeouts = [];
 
+// Sizes the backend's album-art proxy serves (see ART_SIZES in spotify.py).
+const ART_ROW_SIZE = 56;
+const ART_COVER_SIZE = 300;
+
+// Spotify covers go through /spotify/art, which resizes and caches them.
+function artUrl(imageUrl, size) {
+  const match = /^https:\/\/i\.scdn\.co\/image\/([0-9a-f]+)$/.exec(imageUrl || "");
+  if (!match) return imageUrl || "default.jpg";
+  return `${API_BASE_URL}/art/${match[1]}?size=${size}`;
+}
+
 function clearPlayPauseSyncTimeouts() {
   playPauseSyncTimeouts.forEach((t) => clearTimeout(t));
   playPauseSyncTimeouts = [];
 }
 
 function scheduleSongInfoRefresh(delaysMs) {
+  if (playerSocket.connected) return;
   delaysMs.forEach((delay) => {
     playPauseSyncTimeouts.push(setTimeout(updateSongInfo, delay));
   });
 }
 
+function refreshSongInfo() {
+  if (playerSocket.connected) return Promise.resolve();
+  return updateSongInfo();
+}
+
 // Existing sendCommand function
 async function sendCommand(command) {
   try {
@@ -47,15 +75,13 @@ async function sendCommand(command) {
     if (command === "pause" || command === "play") {
       // Spotify state can take a moment to reflect the change; refresh a few times.
       if (!playPausePending) {
-        setTimeout(updateSongInfo, 400);
-        setTimeout(updateSongInfo, 1000);
-        setTimeout(updateSongInfo, 2000);
+        scheduleSongInfoRefresh([400, 1000, 2000]);
       }
     }
 
     if (command === "next" || command === "prev") {
       setTimeout(async () => {
-        await updateSongInfo();
+        await refreshSongInfo();
         scrollToHighlightedSong();
       }, 1000);
     }
@@ -73,72 +99,92 @@ async function updateSongInfo() {
     // Ignore out-of-order responses (can happen with multiple overlapping refreshes)
     if (requestId !== songInfoRequestId) return;
 
-    if (!data || data.error) {
-      document.getElementById("song-title").innerText = "No song playing";
-      document.getElementById("artist-name").innerText = "";
-      document.getElementById("album-art").src = "default.jpg";
-      currentPlaylistId = null;
-      updatePlayPauseIcon(false);
-      isPlaying = false;
-      if (trackUpdateRequest) cancelAnimationFrame(trackUpdateRequest);
-      updateTrackProgress(0, 0);
-      highlightPlayingPlaylist();
+    renderSongInfo(data);
+  } catch (error) {
+    console.error("Error fetching song info:", error);
+    document.getElementById("song-title").innerText = "Error fetching song info";
+    document.getElementById("artist-name").innerText = "Could be that no device is found or song not selected";
+  }
+}
 
-      return;
-    }
+// `data` is a /current-song response or a pushed `now_playing` (null if nothing plays).
+function renderSongInfo(data) {
+  if (!data || data.error) {
+    document.getElementById("song-title").innerText = "No song playing";
+    document.getElementById("artist-name").innerText = "";
+    document.getElementById("album-art").src = "default.jpg";
+    currentPlaylistId = null;
+    updatePlayPauseIcon(false);
+    isPlaying = false;
+    if (trackUpdateRequest) cancelAnimationFrame(trackUpdateRequest);
+    updateTrackProgress(0, 0);
+    highlightPlayingPlaylist();
 
-    // Update UI with song info
-    document.getElementById("song-title").innerText = data.item.name;
-    document.getElementById("artist-name").innerText = data.item.artists
-      .map((artist) => artist.name)
-      .join(", ");
-    document.getElementById("album-art").src =
-      data.item.album.images[0]?.url || "default.jpg";
-
-    lastProgress = data.progress_ms || 0;
-    songDuration = data.item.duration_ms || 0;
-    lastUpdateTime = Date.now();
-    const serverIsPlaying = !!data.is_playing;
-
-    currentPlayingUri = data.item.uri;
-    currentPlaylistId = data.context?.uri?.split(":").pop() || null;
-
-    // Prevent play/pause icon flicker while Spotify is still transitioning states.
-    let effectiveIsPlaying = serverIsPlaying;
-    if (playPausePending) {
-      const ageMs = Date.now() - playPausePending.startedAt;
-      if (ageMs <= 8000) {
-        if (serverIsPlaying === playPausePending.desired) {
-          if (playPausePending.stableSince == null) {
-            playPausePending.stableSince = Date.now();
-          } else if (Date.now() - playPausePending.stableSince >= 900) {
-            playPausePending = null;
-          }
-        } else {
-          playPausePending.stableSince = null;
-        }
+    return;
+  }
 
-        if (playPausePending) {
-          effectiveIsPlaying = playPausePending.desired;
+  // Update UI with song info
+  document.getElementById("song-title").innerText = data.item.name;
+  document.getElementById("artist-name").innerText = data.item.artists
+    .map((artist) => artist.name)
+    .join(", ");
+  document.getElementById("album-art").src =
+    artUrl(data.item.album.images[0]?.url, ART_COVER_SIZE);
+
+  lastProgress = data.progress_ms || 0;
+  songDuration = data.item.duration_ms || 0;
+  lastUpdateTime = Date.now();
+  const serverIsPlaying = !!data.is_playing;
+
+  currentPlayingUri = data.item.uri;
+  currentPlaylistId = data.context?.uri?.split(":").pop() || null;
+
+  // Prevent play/pause icon flicker while Spotify is still transitioning states.
+  let effectiveIsPlaying = serverIsPlaying;
+  if (playPausePending) {
+    const ageMs = Date.now() - playPausePending.startedAt;
+    if (ageMs <= 8000) {
+      if (serverIsPlaying === playPausePending.desired) {
+        if (playPausePending.stableSince == null) {
+          playPausePending.stableSince = Date.now();
+        } else if (Date.now() - playPausePending.stableSince >= 900) {
+          playPausePending = null;
         }
       } else {
-        playPausePending = null;
+        playPausePending.stableSince = null;
+      }
+
+      if (playPausePending) {
+        effectiveIsPlaying = playPausePending.desired;
       }
+    } else {
+      playPausePending = null;
     }
+  }
 
-    isPlaying = effectiveIsPlaying;
-    updatePlayPauseIcon(effectiveIsPlaying);
-    updateTrackTime();
+  isPlaying = effectiveIsPlaying;
+  updatePlayPauseIcon(effectiveIsPlaying);
+  updateTrackTime();
 
-    highlightPlayingSong();
-    highlightPlayingPlaylist();
-  } catch (error) {
-    console.error("Error fetching song info:", error);
-    document.getElementById("song-title").innerText = "Error fetching song info";
-    document.getElementById("artist-name").innerText = "Could be that no device is found or song not selected";
-  }
+  highlightPlayingSong();
+  highlightPlayingPlaylist();
 }
 
+playerSocket.on("now_playing", (data) => {
+  const previousUri = currentPlayingUri;
+  songInfoRequestId++; // a fetch still in flight is older than this
+  renderSongInfo(data);
+  if (currentPlayingUri !== previousUri) showPlayingSong();
+});
+
+playerSocket.on("player_state", (state) => {
+  if ("shuffle_state" in state) updateShuffleIcon(state.shuffle_state);
+  if ("repeat_state" in state) updateRepeatIcon(state.repeat_state);
+  if (state.volume_percent != null) {
+    document.getElementById("volume-slider").style.setProperty("--volume-fill", `${state.volume_percent}%`);
+  }
+});
+
 
 function updateTrackTime() {
   if (!isPlaying) return;
@@ -154,7 +200,7 @@ function updateTrackTime() {
 
   if (clampedProgress >= songDuration - 2000) {
     setTimeout(() => {
-      updateSongInfo().then(() => {
+      refreshSongInfo().then(() => {
         scrollToHighlightedSong();
       });
     }, 1500);
@@ -294,12 +340,62 @@ function renderPlaylistFeedback(title, message) {
 }
 
 
+function createTrackItem(track, playlistId) {
+  const li = document.createElement("li");
+  li.classList.add("list-group-item", "d-flex", "align-items-center");
+  li.dataset.trackUri = track.uri;
+
+  // <img> for album cover
+  const img = document.createElement("img");
+  img.src = artUrl(track.image, ART_ROW_SIZE);
+  img.alt = track.name;
+  img.style.width = "40px";
+  img.style.height = "40px";
+  img.style.objectFit = "cover";
+  img.style.marginRight = "10px";
+
+  // <div> for the text (track name + artists)
+  const textDiv = document.createElement("div");
+  textDiv.innerText = `${track.name} - ${track.artists.join(", ")}`;
+
+  li.appendChild(img);
+  li.appendChild(textDiv);
+
+  li.addEventListener("click", (e) => {
+    if (clickBlocked) {
+      e.preventDefault();
+      e.stopPropagation();
+      return;
+    }
+
+    playTrack(track.uri, playlistId);
+  });
+
+  return li;
+}
+
+function appendPlaylistTracks(tracks, playlistId) {
+  const fragment = document.createDocumentFragment();
+  tracks.forEach((track) => fragment.appendChild(createTrackItem(track, playlistId)));
+  document.getElementById("playlist").appendChild(fragment);
+  highlightPlayingSong();
+}
+
+async function fetchPlaylistPage(playlistId, offset, untilUri) {
+  const params = new URLSearchParams({ offset, limit: PLAYLIST_PAGE_LIMIT });
+  if (untilUri) params.set("until", untilUri);
+  const response = await fetch(`${API_BASE_URL}/playlist/${playlistId}?${params}`);
+  return response.json();
+}
+
 async function loadPlaylist(playlistId) {
   try {
     currentlyLoadedPlaylist = playlistId;
+    playlistNextOffset = null;
 
-    const response = await fetch(`${API_BASE_URL}/playlist/${playlistId}`);
-    const data = await response.json();
+    // Load through the playing song so it can be highlighted and scrolled to.
+    const untilUri = playlistId === currentPlaylistId ? currentPlayingUri : null;
+    const data = await fetchPlaylistPage(playlistId, 0, untilUri);
 
     if (data.error) {
       console.error("Error fetching playlist:", data.error);
@@ -318,51 +414,9 @@ async function loadPlaylist(playlistId) {
     const playlistUl = document.getElementById("playlist");
     playlistUl.innerHTML = ""; // clear old items if any
 
-    data.tracks.items.forEach((item) => {
-      const track = item.track;
-      if (!track) return; // skip if no track
-
-      const li = document.createElement("li");
-      li.classList.add("list-group-item", "d-flex", "align-items-center");
-      li.dataset.trackUri = track.uri;
-
-      const albumImages = track.album.images;
-      const albumCoverUrl = albumImages.length
-        ? albumImages[albumImages.length - 1].url // smallest image
-        : "default.jpg";
-
-      // <img> for album cover
-      const img = document.createElement("img");
-      img.src = albumCoverUrl;
-      img.alt = track.name;
-      img.style.width = "40px";
-      img.style.height = "40px";
-      img.style.objectFit = "cover";
-      img.style.marginRight = "10px";
-
-      // <div> for the text (track name + artists)
-      const textDiv = document.createElement("div");
-      textDiv.innerText = `${track.name} - ${track.artists
-        .map((artist) => artist.name)
-        .join(", ")}`;
-
-      li.appendChild(img);
-      li.appendChild(textDiv);
-
-      li.addEventListener("click", (e) => {
-        if (clickBlocked) {
-          e.preventDefault();
-          e.stopPropagation();
-          return;
-        }
-
-        playTrack(track.uri, playlistId);
-      });
-
-      playlistUl.appendChild(li);
-
-      highlightPlayingSong();
-    });
+    playlistSnapshotId = data.snapshot_id;
+    playlistNextOffset = data.next_offset;
+    appendPlaylistTracks(data.tracks, playlistId);
     return true;
   } catch (error) {
     console.error("Error loading playlist:", error);
@@ -374,6 +428,37 @@ async function loadPlaylist(playlistId) {
   }
 }
 
+// Appends the next page of the open playlist (playlist-scroll.js calls this
+// near the bottom of the list). With `untilUri`, loads through that track.
+async function loadMorePlaylistTracks(untilUri = null) {
+  const playlistId = currentlyLoadedPlaylist;
+  if (playlistPageLoading || playlistNextOffset == null || !playlistId) return;
+
+  playlistPageLoading = true;
+  try {
+    const data = await fetchPlaylistPage(playlistId, playlistNextOffset, untilUri);
+    if (playlistId !== currentlyLoadedPlaylist) return;
+
+    if (data.error) {
+      console.error("Error fetching playlist:", data.error);
+      return;
+    }
+
+    if (data.snapshot_id !== playlistSnapshotId) {
+      // The playlist changed since the first page, so the offsets moved.
+      playlistPageLoading = false;
+      await loadPlaylist(playlistId);
+      return;
+    }
+
+    playlistNextOffset = data.next_offset;
+    appendPlaylistTracks(data.tracks, playlistId);
+  } catch (error) {
+    console.error("Error loading playlist:", error);
+  } finally {
+    playlistPageLoading = false;
+  }
+}
 
 async function playTrack(trackUri, trackPlaylistId) {
   try {
@@ -399,7 +484,7 @@ async function playTrack(trackUri, trackPlaylistId) {
     currentPlayingUri = trackUri;
     highlightPlayingSong();
 
-    setTimeout(updateSongInfo, 1000);
+    setTimeout(refreshSongInfo, 1000);
   } catch (error) {
     console.error("Error playing track:", error);
   }
@@ -449,6 +534,7 @@ async function getSpotifyVolume() {
 async function loadPlaylists() {
   try {
     currentlyLoadedPlaylist = null;
+    playlistNextOffset = null;
     const response = await fetch(`${API_BASE_URL}/playlists`);
     const data = await response.json();
 
@@ -470,12 +556,8 @@ async function loadPlaylists() {
       li.classList.add("list-group-item", "d-flex", "align-items-center");
       li.dataset.playlistId = playlist.id;
 
-      const playlistImages = playlist.images;
-      const playlistCoverUrl =
-        playlistImages.length > 0 ? playlistImages[0].url : "default.jpg";
-
       const img = document.createElement("img");
-      img.src = playlistCoverUrl;
+      img.src = artUrl(playlist.image, ART_ROW_SIZE);
       img.alt = playlist.name;
       img.style.width = "40px";
       img.style.height = "40px";
@@ -546,7 +628,16 @@ async function goToCurrentPlaylist() {
     await loadPlaylist(currentPlaylistId);
   }
 
-  setTimeout(scrollToHighlightedSong, 500); // Scroll after loading
+  setTimeout(showPlayingSong, 500); // Scroll after loading
+}
+
+// Scroll to the playing song, first loading more of the open playlist if
+// the song is further down than what has been loaded.
+async function showPlayingSong() {
+  if (currentPlaylistId === currentlyLoadedPlaylist && !document.querySelector(".playing-highlight")) {
+    await loadMorePlaylistTracks(currentPlayingUri);
+  }
+  scrollToHighlightedSong();
 }
 
 function scrollToHighlightedSong() {
@@ -610,6 +701,7 @@ document.addEventListener("DOMContentLoaded", async function () {
 });
 
 setInterval(() => {
+  if (playerSocket.connected) return;
   updateSongInfo();
   fetchPlayerState();
 }, 10000);
@@ -1,5 +1,8 @@
 document.addEventListener("DOMContentLoaded", () => {
     const serverIP = `http://${CONFIG.SERVER_PC_IP}/slideshow`;
+    const CHUNKED_UPLOAD_MIN_BYTES = 16 * 1024 * 1024;
+    const HASH_SLICE_BYTES = 8 * 1024 * 1024;
+    const CHUNK_RETRIES = 5;
 
     const form = document.getElementById("upload-form");
     const imageListDiv = document.getElementById("image-list");
@@ -7,32 +10,49 @@ document.addEventListener("DOMContentLoaded", () => {
 
     async function fetchImages() {
         try {
-            const response = await fetch(`${serverIP}/media`);
-            const text = await response.text();
-            let images;
-            try {
-                images = JSON.parse(text);
-            } catch (e) {
-                console.error("Failed to parse JSON!", e);
-                return;
+            // Newest first, all pages
+            const images = [];
+            let offset = 0;
+            while (offset !== null) {
+                const response = await fetch(`${serverIP}/media?sort=mtime&order=desc&offset=${offset}&limit=5000`);
+                let page;
+                try {
+                    page = JSON.parse(await response.text());
+                } catch (e) {
+                    console.error("Failed to parse JSON!", e);
+                    return;
+                }
+                images.push(...page.items);
+                offset = page.next_offset;
             }
     
             imageListDiv.innerHTML = "";
     
-            images.forEach(file => {
+            images.forEach(item => {
+                const file = item.name;
                 const ext = file.split('.').pop().toLowerCase();
-                const fileUrl = `${serverIP}/uploads/${file}`;
+                const version = item.hash ? `?v=${item.hash}` : "";
+                const fileUrl = `${serverIP}/uploads/${encodeURIComponent(file)}${version}`;
+                const thumbUrl = `${serverIP}/renditions/thumb/${encodeURIComponent(file)}${version}`;
     
                 const container = document.createElement("div");
                 container.className = "media-container";
                 container.dataset.filename = file;
     
-                let mediaElement;
-                if (!["mp4", "webm", "ogg"].includes(ext)) {
-                    mediaElement = document.createElement("img");
-                    mediaElement.src = fileUrl;
-                    mediaElement.className = "media-preview";
-                }
+                // Thumbnails for both; videos only have one when the server has ffmpeg
+                const isVideo = ["mp4", "webm", "ogg"].includes(ext);
+                const mediaElement = document.createElement("img");
+                mediaElement.src = thumbUrl;
+                mediaElement.className = "media-preview";
+                mediaElement.loading = "lazy";
+                mediaElement.addEventListener("error", () => {
+                    if (isVideo) {
+                        mediaElement.remove();
+                    } else if (!mediaElement.dataset.original) {
+                        mediaElement.dataset.original = "1";
+                        mediaElement.src = fileUrl;
+                    }
+                });
 
                 const label = document.createElement("div");
                 label.textContent = file;
@@ -93,59 +113,160 @@ document.addEventListener("DOMContentLoaded", () => {
         const statusText = document.getElementById("upload-text");
         const progressBar = document.getElementById("upload-progress");
         
-        let duplicateCount = 0;
-
+        // Hash everything first, then ask about all of them in one request
+        const hashes = [];
         for (let i = 0; i < files.length; i++) {
-            const file = files[i];
-            const hash = await calculateFileHash(file);
-        
-            // Check with backend if file is duplicate
-            const res = await fetch(`${serverIP}/check-hash`, {
+            statusText.textContent = `Checking ${files[i].name} (${i + 1}/${files.length})...`;
+            progressBar.value = (i / files.length) * 100;
+            hashes.push(await calculateFileHash(files[i]));
+        }
+
+        // If the check fails, upload everything; the server still skips duplicates
+        let duplicates = [];
+        try {
+            const res = await fetch(`${serverIP}/check-hashes`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ hash }),
+                body: JSON.stringify({ hashes }),
             });
-            const result = await res.json();
-        
-            if (result.duplicate) {
-                duplicateCount++;
-                statusText.textContent = `Duplicate skipped: ${file.name} (${i + 1}/${files.length})`;
-                continue; // skip this file
+            if (res.ok) {
+                const result = await res.json();
+                if (Array.isArray(result.duplicates)) duplicates = result.duplicates;
             }
-        
-            // Upload if the file is not a duplicate
-            const formData = new FormData();
-            formData.append("file", file);
-        
-            await new Promise((resolve, reject) => {
-                const xhr = new XMLHttpRequest();
-                xhr.open("POST", `${serverIP}/upload`);
-        
-                xhr.upload.onprogress = (e) => {
-                    if (e.lengthComputable) {
-                        const percent = (e.loaded / e.total) * 100;
-                        progressBar.value = percent;
-                        statusText.textContent = `Uploading ${file.name} (${i + 1}/${files.length})... ${Math.round(percent)}%`;
-                    }
-                };
-        
-                xhr.onload = () => xhr.status === 200 ? resolve() : reject(new Error("Upload failed"));
-                xhr.onerror = () => reject(new Error("Upload error"));
-                xhr.send(formData);
-            });
+        } catch (error) {
+            console.error("Error checking for duplicates:", error);
         }
-    
-        statusText.textContent = `All files uploaded!${duplicateCount > 0 ? ` (${duplicateCount} duplicate${duplicateCount > 1 ? "s" : ""} skipped)` : ""}`;
+        const skipHashes = new Set(duplicates);
+
+        // Same file picked twice counts as a duplicate too
+        const newFiles = [];
+        for (let i = 0; i < files.length; i++) {
+            if (!skipHashes.has(hashes[i])) {
+                skipHashes.add(hashes[i]);
+                newFiles.push(files[i]);
+            }
+        }
+        const duplicateCount = files.length - newFiles.length;
+
+        // One file failing (e.g. a large non-media file the session route
+        // refuses) is reported at the end instead of stopping the batch
+        const failed = [];
+        for (let i = 0; i < newFiles.length; i++) {
+            const file = newFiles[i];
+            const showProgress = (loaded) => {
+                const percent = (loaded / file.size) * 100;
+                progressBar.value = percent;
+                statusText.textContent = `Uploading ${file.name} (${i + 1}/${newFiles.length})... ${Math.round(percent)}%`;
+            };
+
+            try {
+                if (file.size >= CHUNKED_UPLOAD_MIN_BYTES) {
+                    await uploadInChunks(file, showProgress);
+                    continue;
+                }
+
+                const formData = new FormData();
+                formData.append("file", file);
+
+                await new Promise((resolve, reject) => {
+                    const xhr = new XMLHttpRequest();
+                    xhr.open("POST", `${serverIP}/upload`);
+
+                    xhr.upload.onprogress = (e) => {
+                        if (e.lengthComputable) {
+                            showProgress((e.loaded / e.total) * file.size);
+                        }
+                    };
+
+                    xhr.onload = () => xhr.status === 200 ? resolve() : reject(new Error("Upload failed"));
+                    xhr.onerror = () => reject(new Error("Upload error"));
+                    xhr.send(formData);
+                });
+            } catch (error) {
+                console.error(`Error uploading ${file.name}:`, error);
+                failed.push(file.name);
+            }
+        }
+
+        const skipped = duplicateCount > 0 ? ` (${duplicateCount} duplicate${duplicateCount > 1 ? "s" : ""} skipped)` : "";
+        statusText.textContent = failed.length === 0
+            ? `All files uploaded!${skipped}`
+            : `${newFiles.length - failed.length} of ${newFiles.length} files uploaded${skipped}. Failed: ${failed.join(", ")}`;
         progressBar.value = 100;
         form.reset();
         fetchImages();
     });
     
+    // Hash in slices so large videos aren't read into memory at once
     async function calculateFileHash(file) {
-        const buffer = await file.arrayBuffer();
-        const hashHex = sha256(new Uint8Array(buffer));
-        return hashHex;
-    }    
+        const hash = sha256.create();
+        for (let start = 0; start < file.size; start += HASH_SLICE_BYTES) {
+            const buffer = await file.slice(start, start + HASH_SLICE_BYTES).arrayBuffer();
+            hash.update(new Uint8Array(buffer));
+        }
+        return hash.hex();
+    }
+
+    // Large files go up in chunks through an upload session. The session id is
+    // kept per file, so a dropped connection, or picking the same file again
+    // after a reload, continues from the last byte the server has.
+    async function uploadInChunks(file, onProgress) {
+        const key = `uploadSession:${file.name}:${file.size}:${file.lastModified}`;
+        let uploadId = localStorage.getItem(key);
+        let offset = 0;
+        let chunkSize = 8 * 1024 * 1024;
+
+        if (uploadId) {
+            const res = await fetch(`${serverIP}/upload-sessions/${uploadId}`);
+            if (res.ok) {
+                offset = (await res.json()).offset;
+            } else {
+                uploadId = null;
+            }
+        }
+        if (!uploadId) {
+            const res = await fetch(`${serverIP}/upload-sessions`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ filename: file.name, size: file.size }),
+            });
+            if (!res.ok) {
+                const result = await res.json().catch(() => ({}));
+                throw new Error(result.error || "Could not start upload");
+            }
+            const session = await res.json();
+            uploadId = session.upload_id;
+            chunkSize = session.chunk_size;
+            localStorage.setItem(key, uploadId);
+        }
+
+        let failures = 0;
+        while (offset < file.size) {
+            onProgress(offset);
+            try {
+                const res = await fetch(`${serverIP}/upload-sessions/${uploadId}?offset=${offset}`, {
+                    method: "PUT",
+                    headers: { "Content-Type": "application/octet-stream" },
+                    body: file.slice(offset, offset + chunkSize),
+                });
+                const result = await res.json();
+                // On 409 the server says where it actually is
+                if (!res.ok && res.status !== 409) throw new Error(result.error);
+                offset = result.offset;
+                failures = 0;
+            } catch (error) {
+                if (++failures > CHUNK_RETRIES) throw error;
+                await new Promise(r => setTimeout(r, 1000 * failures));
+                const res = await fetch(`${serverIP}/upload-sessions/${uploadId}`).catch(() => null);
+                if (res && res.ok) offset = (await res.json()).offset;
+            }
+        }
+
+        const res = await fetch(`${serverIP}/upload-sessions/${uploadId}/commit`, { method: "POST" });
+        if (!res.ok) throw new Error("Upload failed");
+        localStorage.removeItem(key);
+        onProgress(file.size);
+    }
     
     returnBtn.addEventListener("click", () => {
         window.location.href = "/settings";